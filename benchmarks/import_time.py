@@ -0,0 +1,58 @@
+"""Measure the time needed to import nxtools in a fresh interpreter.
+
+Usage:
+    python benchmarks/import_time.py [--runs 20] [--module nxtools]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module: str) -> dict[str, int]:
+    """Return cumulative import times (in microseconds) of all modules."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        result[name.strip()] = int(cumulative)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--module", default="nxtools")
+    args = parser.parse_args()
+
+    measure(args.module)  # warm up (and write bytecode caches)
+    totals = []
+    modules: dict[str, list[int]] = {}
+    for _ in range(args.runs):
+        result = measure(args.module)
+        totals.append(result[args.module])
+        for name, value in result.items():
+            modules.setdefault(name, []).append(value)
+
+    print(f"import {args.module}: {statistics.median(totals) / 1000:.2f} ms (median)")
+    print("Loaded modules (top 10):")
+    top = sorted(modules.items(), key=lambda x: -statistics.median(x[1]))
+    for name, values in top[1:11]:
+        print(f"  {name:40} {statistics.median(values) / 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""Benchmarks of nxtools hot paths.
+
+Usage:
+    python benchmarks/run.py                       # run all, print a table
+    python benchmarks/run.py slugify tc2s          # run selected benchmarks
+    python benchmarks/run.py --json results.json   # save machine-readable results
+    python benchmarks/run.py --compare baseline.json [--threshold 0.1]
+
+Each benchmark is run `--repeat` times and the median time per operation
+is reported. With `--compare`, results are compared to a previously saved
+JSON file and the script exits with status 1 if any benchmark is slower
+than the baseline by more than the threshold.
+
+No ffmpeg binary is needed: FFMPEG output parsing is replayed
+from recorded stderr fixtures in `benchmarks/fixtures`.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+sys.path.insert(0, ROOT)
+
+from nxtools.files import get_files  # noqa: E402
+from nxtools.logging import Logging, StreamSink  # noqa: E402
+from nxtools.media.ffmpeg import FFMPEG  # noqa: E402
+from nxtools.text import slugify, unaccent  # noqa: E402
+from nxtools.timeutils import f2tc, format_time, s2tc, tc2s  # noqa: E402
+
+TITLES = [
+    "Příliš žluťoučký kůň úpěl ďábelské ódy",
+    "Večerní zprávy: Počasí na víkend (12.3.2024)",
+    "Die Großen Kriege der Weltgeschichte - Folge 7",
+    "L'été où tout a changé / Épisode spécial",
+    "Кино и Немцы: история одного фильма",
+    "Ταξίδι στην Ελλάδα - Κρήτη",
+    "Sport #42: Hockey | Finále MS 2024 ~ highlights",
+    "東京オリンピック 2020 ハイライト",
+    "The Quick Brown Fox Jumps Over The Lazy Dog",
+    "Zákulisí Nebula broadcast automation (Making of)",
+]
+
+#
+# Benchmark registry
+#
+
+# name -> (setup, number of operations per run)
+# setup returns a callable executing the operations and an optional cleanup
+BENCHMARKS: dict[str, tuple[Callable, int]] = {}
+
+
+def benchmark(name: str, ops: int):
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, ops)
+        return setup
+
+    return decorator
+
+
+@benchmark("unaccent", ops=len(TITLES) * 100)
+def bench_unaccent():
+    def run():
+        for _ in range(100):
+            for title in TITLES:
+                unaccent(title)
+
+    return run, None
+
+
+@benchmark("slugify", ops=len(TITLES) * 100)
+def bench_slugify():
+    def run():
+        for _ in range(100):
+            for title in TITLES:
+                slugify(title)
+
+    return run, None
+
+
+@benchmark("slugify_set", ops=len(TITLES) * 100)
+def bench_slugify_set():
+    def run():
+        for _ in range(100):
+            for title in TITLES:
+                slugify(title, make_set=True, min_length=2)
+
+    return run, None
+
+
+@benchmark("tc2s", ops=10000)
+def bench_tc2s():
+    timecodes = [s2tc(i * 7.3) for i in range(1000)]
+
+    def run():
+        for _ in range(10):
+            for tc in timecodes:
+                tc2s(tc)
+
+    return run, None
+
+
+@benchmark("s2tc", ops=10000)
+def bench_s2tc():
+    def run():
+        for i in range(10000):
+            s2tc(i * 3.37)
+
+    return run, None
+
+
+@benchmark("f2tc", ops=10000)
+def bench_f2tc():
+    def run():
+        for i in range(10000):
+            f2tc(i * 13)
+
+    return run, None
+
+
+@benchmark("format_time", ops=10000)
+def bench_format_time():
+    now = time.time()
+
+    def run():
+        for i in range(10000):
+            format_time(now + i)
+
+    return run, None
+
+
+def _null_logger(format: str) -> Logging:
+    logger = Logging()
+    null = open(os.devnull, "w")
+    logger.sinks = [StreamSink(null, format=format, colors=True)]
+    return logger
+
+
+@benchmark("logging_send_text", ops=10000)
+def bench_logging_text():
+    logger = _null_logger("text")
+
+    def run():
+        for i in range(10000):
+            logger.info("Processing", "asset", i, user="bench")
+
+    return run, None
+
+
+@benchmark("logging_send_json", ops=10000)
+def bench_logging_json():
+    logger = _null_logger("json")
+
+    def run():
+        for i in range(10000):
+            logger.info("Processing", "asset", i, user="bench", asset_id=i)
+
+    return run, None
+
+
+@benchmark("logging_suppressed_debug", ops=100000)
+def bench_logging_suppressed():
+    logger = _null_logger("text")
+    logger.set_level(30)
+
+    def run():
+        for i in range(100000):
+            logger.debug("Processing", "asset", i)
+
+    return run, None
+
+
+@benchmark("get_files", ops=2000)
+def bench_get_files():
+    root = tempfile.mkdtemp(prefix="nxtools-bench-")
+    for i in range(20):
+        dir_path = os.path.join(root, f"dir{i:02d}", "sub")
+        os.makedirs(dir_path)
+        for j in range(100):
+            ext = "mov" if j % 2 else "mxf"
+            with open(os.path.join(dir_path, f"file{j:03d}.{ext}"), "w") as f:
+                f.write("x" * j)
+
+    def run():
+        for _ in get_files(root, recursive=True):
+            pass
+
+    return run, lambda: shutil.rmtree(root)
+
+
+@benchmark("ffmpeg_process", ops=1)
+def bench_ffmpeg_process():
+    with open(os.path.join(FIXTURES_DIR, "ffmpeg_transcode.stderr"), "rb") as f:
+        data = f.read()
+
+    class ReplayProcess:
+        def __init__(self):
+            self.stderr = io.BytesIO(data)
+
+    positions = []
+
+    def run():
+        ff = FFMPEG()
+        ff.reset_stderr()
+        ff.proc = ReplayProcess()
+        positions.clear()
+        while ff.process(progress_handler=positions.append):
+            pass
+        assert positions[-1] == 600, positions[-1]
+
+    return run, None
+
+
+#
+# Runner
+#
+
+
+def run_benchmark(name: str, repeat: int) -> dict[str, float]:
+    setup, ops = BENCHMARKS[name]
+    func, cleanup = setup()
+    try:
+        func()  # warm up
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+    finally:
+        if cleanup is not None:
+            cleanup()
+    return {
+        "ops": ops,
+        "repeat": repeat,
+        "median_us": statistics.median(times) / ops * 1e6,
+        "min_us": min(times) / ops * 1e6,
+        "stdev_us": (statistics.stdev(times) if repeat > 1 else 0) / ops * 1e6,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    """Print comparison with the baseline. Return False on regression."""
+    ok = True
+    print()
+    print(f"{'benchmark':30} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]["median_us"]
+        current = result["median_us"]
+        change = current / base - 1 if base else 0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"{name:30} {base:10.3f}us {current:10.3f}us {change:+8.1%}{flag}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="nxtools benchmarks",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--json", help="write results to a JSON file")
+    parser.add_argument("--compare", help="compare with a baseline JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown considered a regression (default: 0.1)",
+    )
+    parser.add_argument("--list", action="store_true", help="list benchmarks")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return
+
+    names = args.names or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f"Unknown benchmark: {name}")
+
+    results = {}
+    print(f"{'benchmark':30} {'median':>12} {'min':>12}")
+    for name in names:
+        result = run_benchmark(name, args.repeat)
+        results[name] = result
+        print(f"{name:30} {result['median_us']:10.3f}us {result['min_us']:10.3f}us")
+
+    if args.json:
+        data = {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(data, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if not compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ __all__ = [
     # common
     "find_binary",
     "get_guid",
+    "iterxml",
     "xml",
     # text
     "format_filesize",
@@ -11,6 +12,7 @@ __all__ = [
     "string2color",
     "unaccent",
     # time
+    "IntervalIndex",
     "datestr2ts",
     "f2tc",
     "format_time",
@@ -19,33 +21,84 @@ __all__ = [
     "s2words",
     "tc2s",
     # logging
+    "Lazy",
     "critical_error",
     "log_traceback",
     "logging",
+    # metrics
+    "metrics",
     #
     "FFMPEG",
     "ffmpeg",
     "ffprobe",
 ]
 
-from .common import find_binary, get_guid, xml
-from .logging import critical_error, log_traceback, logging
-from .media.ffmpeg import FFMPEG, ffmpeg
-from .media.ffprobe import ffprobe
-from .text import (
-    format_filesize,
-    fract2float,
-    indent,
-    slugify,
-    string2color,
-    unaccent,
-)
-from .timeutils import (
-    datestr2ts,
-    f2tc,
-    format_time,
-    s2tc,
-    s2time,
-    s2words,
-    tc2s,
-)
+import importlib
+from typing import TYPE_CHECKING, Any
+
+# `logging` and `metrics` are imported eagerly: they are shared by all
+# submodules and their names collide with the submodules themselves.
+from .logging import Lazy, critical_error, log_traceback, logging
+from .metrics import metrics
+
+_LAZY_ATTRIBUTES = {
+    "find_binary": ".common",
+    "get_guid": ".common",
+    "iterxml": ".common",
+    "xml": ".common",
+    "format_filesize": ".text",
+    "fract2float": ".text",
+    "indent": ".text",
+    "slugify": ".text",
+    "string2color": ".text",
+    "unaccent": ".text",
+    "IntervalIndex": ".timeutils",
+    "datestr2ts": ".timeutils",
+    "f2tc": ".timeutils",
+    "format_time": ".timeutils",
+    "s2tc": ".timeutils",
+    "s2time": ".timeutils",
+    "s2words": ".timeutils",
+    "tc2s": ".timeutils",
+    "FFMPEG": ".media.ffmpeg",
+    "ffmpeg": ".media.ffmpeg",
+    "ffprobe": ".media.ffprobe",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import public names on first access."""
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .common import find_binary, get_guid, iterxml, xml
+    from .media.ffmpeg import FFMPEG, ffmpeg
+    from .media.ffprobe import ffprobe
+    from .text import (
+        format_filesize,
+        fract2float,
+        indent,
+        slugify,
+        string2color,
+        unaccent,
+    )
+    from .timeutils import (
+        IntervalIndex,
+        datestr2ts,
+        f2tc,
+        format_time,
+        s2tc,
+        s2time,
+        s2words,
+        tc2s,
+    )
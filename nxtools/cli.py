@@ -0,0 +1,390 @@
+"""nxtools command line interface."""
+
+__all__ = ["main", "BatchTranscoder"]
+
+import argparse
+import contextlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .files import FileObject, get_path_pairs
+from .logging import logging
+from .media.ffmpeg import FFMPEG
+from .media.ffprobe import ffprobe
+from .text import format_filesize, indent
+from .timeutils import s2time
+
+DEFAULT_TEMPLATE = "-i {input} -c:v libx264 -c:a aac {output}"
+JOURNAL_NAME = ".nxtools-journal"
+
+
+class Job:
+    """A single file conversion."""
+
+    def __init__(self, input_file: FileObject, output_file: FileObject):
+        self.input_file = input_file
+        self.output_file = output_file
+        self.duration = 0.0
+        self.position = 0.0
+        self.ff: FFMPEG | None = None
+
+    @property
+    def key(self) -> str:
+        return self.input_file.path
+
+
+class Journal:
+    """Append-only record of finished conversions.
+
+    Each line is a JSON object with the input path, its modification
+    time and the result, so an interrupted run can skip finished files.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.done: dict[str, int] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # truncated line of an interrupted run
+                    if entry.get("status") == "done":
+                        self.done[entry["input"]] = entry["mtime"]
+                    else:
+                        self.done.pop(entry["input"], None)
+
+    def is_done(self, job: Job) -> bool:
+        return self.done.get(job.key) == job.input_file.mtime
+
+    def record(self, job: Job, status: str) -> None:
+        entry = {
+            "input": job.key,
+            "mtime": job.input_file.mtime,
+            "output": job.output_file.path,
+            "status": status,
+            "time": time.time(),
+        }
+        with self.lock, open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+class BatchTranscoder:
+    """Convert all files from an input directory tree to an output tree.
+
+    Args:
+        input_dir (str):
+            Source directory (crawled recursively)
+
+        output_dir (str):
+            Target directory. The directory structure is preserved.
+
+        template (str):
+            ffmpeg arguments. `{input}` and `{output}` placeholders
+            are replaced with the file paths.
+
+        target_ext (str):
+            Extension of output files (default: same as input)
+
+        workers (int):
+            Number of concurrent ffmpeg processes (default: 1)
+
+        journal (str):
+            Path to the journal file
+            (default: `.nxtools-journal` in the output directory)
+
+        exts (list[str]):
+            Process only files with these extensions
+
+        force (bool):
+            Convert files even if an up-to-date output exists
+
+        target_slugify (bool):
+            Slugify output file names
+    """
+
+    def __init__(
+        self,
+        input_dir: str,
+        output_dir: str,
+        template: str = DEFAULT_TEMPLATE,
+        target_ext: str | None = None,
+        workers: int = 1,
+        journal: str | None = None,
+        exts: list[str] | None = None,
+        force: bool = False,
+        target_slugify: bool = False,
+    ):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.template = shlex.split(template)
+        if "{input}" not in template or "{output}" not in template:
+            raise ValueError("Template must contain {input} and {output}")
+        self.target_ext = target_ext
+        self.workers = max(1, workers)
+        self.journal = Journal(journal or os.path.join(output_dir, JOURNAL_NAME))
+        self.exts = exts
+        self.force = force
+        self.target_slugify = target_slugify
+
+        self.lock = threading.Lock()
+        self.running: list[Job] = []
+        self.total = 0
+        self.finished = 0
+        self.failed = 0
+        self.skipped = 0
+        self.processed_secs = 0.0
+        self.start_time = 0.0
+        self.stopping = False
+
+    def collect(self) -> list[Job]:
+        """Return jobs which need to be processed."""
+        jobs = []
+        for input_file, output_file in get_path_pairs(
+            self.input_dir,
+            self.output_dir,
+            target_ext=self.target_ext,
+            target_slugify=self.target_slugify,
+            exts=self.exts,
+        ):
+            job = Job(input_file, output_file)
+            if not self.force:
+                if self.journal.is_done(job) and output_file.exists:
+                    self.skipped += 1
+                    continue
+                if output_file.exists and output_file.mtime >= input_file.mtime:
+                    self.skipped += 1
+                    continue
+            jobs.append(job)
+        return jobs
+
+    def build_args(self, job: Job, output_path: str) -> list[str]:
+        # only the placeholders are replaced: ffmpeg arguments
+        # (e.g. drawtext expressions) may contain other braces
+        return [
+            arg.replace("{input}", job.input_file.path).replace("{output}", output_path)
+            for arg in self.template
+        ]
+
+    def convert(self, job: Job) -> bool:
+        """Convert a single file. Return `True` on success.
+
+        ffmpeg failures are logged and reported by the return value,
+        other errors (for example an unwritable output directory) raise.
+        """
+        out_dir = job.output_file.dir_name
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        # ffmpeg guesses the output format from the extension, so keep it
+        tmp_path = os.path.join(
+            out_dir,
+            f".{job.output_file.base_name}.part.{job.output_file.ext or 'tmp'}",
+        )
+
+        meta = ffprobe(job.input_file.path) or {}
+        try:
+            job.duration = float(meta.get("format", {}).get("duration", 0))
+        except ValueError:
+            job.duration = 0
+
+        def progress_handler(position: float) -> None:
+            job.position = position
+
+        job.ff = FFMPEG(*self.build_args(job, tmp_path))
+        with self.lock:
+            self.running.append(job)
+        try:
+            job.ff.start(stdin=subprocess.DEVNULL)
+            job.ff.wait(progress_handler=progress_handler)
+            success = job.ff.return_code == 0 and not self.stopping
+            if success:
+                os.replace(tmp_path, job.output_file.path)
+        finally:
+            with self.lock:
+                self.running.remove(job)
+            if os.path.exists(tmp_path):
+                with contextlib.suppress(OSError):
+                    os.remove(tmp_path)
+
+        if not success and not self.stopping:
+            logging.error(
+                "Unable to convert",
+                f"{job.input_file.path}\n\n{indent(job.ff.error_log)}",
+            )
+        return success
+
+    def process(self, job: Job) -> bool:
+        """Convert a file and record the result.
+
+        Errors are handled per job, so a single failure
+        does not abort the whole batch.
+        """
+        if self.stopping:
+            return False
+        try:
+            success = self.convert(job)
+        except Exception as e:
+            success = False
+            if not self.stopping:
+                logging.error("Unable to convert", f"{job.input_file.path}: {e}")
+
+        if not self.stopping:
+            with contextlib.suppress(OSError):
+                self.journal.record(job, "done" if success else "failed")
+
+        with self.lock:
+            self.finished += 1
+            if not success and not self.stopping:
+                self.failed += 1
+            self.processed_secs += job.duration if success else 0
+        return success
+
+    def status_line(self) -> str:
+        with self.lock:
+            running = list(self.running)
+            finished = self.finished
+            failed = self.failed
+            processed = self.processed_secs
+        processed += sum(job.position for job in running)
+        elapsed = max(time.time() - self.start_time, 0.001)
+        line = f"[{finished}/{self.total}]"
+        if failed:
+            line += f" failed: {failed}"
+        line += f" running: {len(running)}"
+        line += f" | media: {s2time(processed, show_fracs=False)}"
+        line += f" speed: {processed / elapsed:.2f}x"
+        for job in running:
+            if job.duration:
+                pct = min(100, job.position / job.duration * 100)
+                line += f" | {job.input_file.base_name[:20]} {pct:.0f}%"
+        return line
+
+    def _display(self, done: threading.Event) -> None:
+        tty = sys.stderr.isatty()
+        interval = 0.5 if tty else 10
+        while not done.wait(interval):
+            if tty:
+                sys.stderr.write("\r\033[K" + self.status_line())
+                sys.stderr.flush()
+            else:
+                logging.info(self.status_line())
+        if tty:
+            sys.stderr.write("\r\033[K")
+
+    def run(self) -> bool:
+        """Process all files. Return `True` if there were no failures."""
+        jobs = self.collect()
+        self.total = len(jobs)
+        total_size = sum(job.input_file.size for job in jobs)
+        logging.info(
+            f"Converting {self.total} files ({format_filesize(total_size)})",
+            f"using {self.workers} workers, {self.skipped} up-to-date files skipped",
+        )
+        if not jobs:
+            return True
+
+        self.start_time = time.time()
+        done = threading.Event()
+        display = threading.Thread(target=self._display, args=(done,), daemon=True)
+        display.start()
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            for _ in executor.map(self.process, jobs):
+                pass
+        except KeyboardInterrupt:
+            self.stopping = True
+            logging.warning("Interrupted. Stopping running conversions")
+            with self.lock:
+                for job in self.running:
+                    if job.ff is not None:
+                        job.ff.stop()
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+        finally:
+            executor.shutdown(wait=True)
+            done.set()
+            display.join()
+
+        logging.goodnews(
+            f"Finished {self.finished - self.failed} of {self.total} files",
+            f"in {s2time(time.time() - self.start_time, show_fracs=False)}",
+        )
+        if self.failed:
+            logging.error(f"{self.failed} files failed")
+        return not self.failed
+
+
+def transcode_command(args: argparse.Namespace) -> int:
+    transcoder = BatchTranscoder(
+        args.input_dir,
+        args.output_dir,
+        template=args.template,
+        target_ext=args.ext,
+        workers=args.workers,
+        journal=args.journal,
+        exts=args.exts.split(",") if args.exts else None,
+        force=args.force,
+        target_slugify=args.slugify,
+    )
+    try:
+        return 0 if transcoder.run() else 1
+    except KeyboardInterrupt:
+        return 130
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Entry point of the `nxtools` console script."""
+    parser = argparse.ArgumentParser(prog="nxtools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    transcode = subparsers.add_parser(
+        "transcode",
+        help="convert a directory tree using ffmpeg",
+        description=(
+            "Convert all files in INPUT_DIR to OUTPUT_DIR. "
+            "Up-to-date outputs and files finished by an interrupted run "
+            "(recorded in a journal) are skipped."
+        ),
+    )
+    transcode.add_argument("input_dir")
+    transcode.add_argument("output_dir")
+    transcode.add_argument(
+        "-t",
+        "--template",
+        default=DEFAULT_TEMPLATE,
+        help=f"ffmpeg arguments with {{input}} and {{output}} placeholders "
+        f"(default: '{DEFAULT_TEMPLATE}')",
+    )
+    transcode.add_argument("-e", "--ext", help="output file extension")
+    transcode.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of parallel ffmpeg processes (default: number of CPUs)",
+    )
+    transcode.add_argument("--exts", help="comma separated input extensions")
+    transcode.add_argument("--journal", help="path to the journal file")
+    transcode.add_argument(
+        "-f", "--force", action="store_true", help="convert up-to-date files too"
+    )
+    transcode.add_argument(
+        "--slugify", action="store_true", help="slugify output file names"
+    )
+    transcode.set_defaults(func=transcode_command)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,9 @@
 import os
+import shutil
 import sys
 import uuid
-from typing import Literal
+from collections.abc import Iterator
+from typing import IO, Literal
 from xml.etree import ElementTree
 
 from .logging import logging
@@ -21,6 +23,58 @@ def xml(data: str) -> ElementTree.Element | None:
     return ElementTree.XML(data)
 
 
+def iterxml(source: str | IO[bytes], tag: str) -> Iterator[ElementTree.Element]:
+    """Iterate over elements with the given tag in a (large) XML document.
+
+    The document is parsed incrementally and each matching element
+    is yielded as soon as it is complete. Once the consumer moves on,
+    the element and already processed siblings are discarded,
+    so memory usage does not depend on the document size.
+
+    Do not keep references to yielded elements - they are cleared
+    after the next iteration. Copy the data you need instead.
+
+    Args:
+        source (str | file):
+            Path to the XML file or a binary file-like object
+
+        tag (str):
+            Tag of the elements to yield. A tag without a namespace
+            matches elements in any namespace (`item` matches
+            `{http://search.yahoo.com/mrss/}item` as well).
+
+    Yields:
+        ElementTree.Element: matching elements in document order
+    """
+    match_any_ns = not tag.startswith("{")
+    suffix = "}" + tag
+    stack: list[ElementTree.Element] = []
+    inside = 0  # number of open matching elements
+
+    def matches(elem_tag: str) -> bool:
+        return elem_tag == tag or (match_any_ns and elem_tag.endswith(suffix))
+
+    for event, elem in ElementTree.iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if matches(elem.tag):
+                inside += 1
+            continue
+
+        stack.pop()
+        if matches(elem.tag):
+            inside -= 1
+            if inside:
+                continue  # nested match, wait for the outer element
+            yield elem
+        elif inside:
+            continue  # part of a matching element
+        elem.clear()
+        if stack:
+            # drop processed children of the parent element
+            stack[-1].remove(elem)
+
+
 def get_uuid(uuid_type: Literal[1, 4] = 1) -> str:
     """Return an UUID of the specified type"""
     if uuid_type == 1:
@@ -56,3 +110,33 @@ def find_binary(file_name: str) -> str | None:
             if os.path.exists(fpath):
                 return fpath
     raise FileNotFoundError(f"Could not find {file_name}")
+
+
+_resolved_binaries: dict[str, str] = {}
+
+
+def resolve_binary(file_name: str) -> str:
+    """Return an absolute path to a given executable.
+
+    The executable is searched for in PATH only. Found paths are cached,
+    so the search runs only once per process. When the executable
+    cannot be found, its name is returned as is (and not cached)
+    and resolution is left to the OS when the process is spawned.
+
+    Args:
+        file_name (str): The name of the executable to find
+
+    Returns:
+        str: The absolute path to the executable (or its name)
+    """
+    path = _resolved_binaries.get(file_name)
+    if path is not None:
+        return path
+    found = shutil.which(file_name)
+    if not found:
+        return file_name
+    path = os.path.abspath(found)
+    # relative PATH entries depend on the working directory
+    if os.path.isabs(found):
+        _resolved_binaries[file_name] = path
+    return path
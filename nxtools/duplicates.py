@@ -0,0 +1,199 @@
+"""Duplicate files detection."""
+
+__all__ = ["find_duplicates"]
+
+import hashlib
+import itertools
+import os
+from collections import defaultdict
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from .files import FileObject, get_files
+from .logging import logging
+from .metrics import metrics
+from .text import format_filesize
+
+# Size of the head and tail blocks compared before hashing whole files
+FINGERPRINT_BLOCK = 64 * 1024
+
+# Chunk size used for full hashing
+HASH_CHUNK = 1024 * 1024
+
+
+def _fingerprint(file_object: FileObject, block: int) -> bytes:
+    """Return a hash of the head and tail of a file.
+
+    The whole file is hashed if it is not longer than two blocks.
+    """
+    size = file_object.size
+    digest = hashlib.blake2b()
+    if size <= block * 2:
+        digest.update(file_object.read_range(0, size))
+    else:
+        digest.update(file_object.read_range(0, block))
+        digest.update(file_object.read_range(size - block, block))
+    return digest.digest()
+
+
+def _full_hash(file_object: FileObject) -> bytes:
+    digest = hashlib.blake2b()
+    for chunk in file_object.iter_chunks(HASH_CHUNK):
+        digest.update(chunk)
+    return digest.digest()
+
+
+def _without_hardlinks(files: list[FileObject]) -> list[FileObject]:
+    """Keep one path per inode, so hard links are not reported."""
+    seen = set()
+    result = []
+    for file_object in files:
+        try:
+            stat_result = os.stat(file_object.path)
+        except OSError:
+            continue
+        key = (stat_result.st_dev, stat_result.st_ino)
+        if key in seen:
+            continue
+        seen.add(key)
+        result.append(file_object)
+    return result
+
+
+def find_duplicates(
+    *roots: str,
+    exts: list[str] | None = None,
+    hidden: bool = False,
+    min_size: int = 1,
+    workers: int = 4,
+    block_size: int = FINGERPRINT_BLOCK,
+) -> Iterator[list[FileObject]]:
+    """Find files with identical content in one or more directory trees.
+
+    Files are compared in stages, each reading more data, but only
+    for files which are still candidates:
+
+     1. file sizes (from the directory crawl, no data is read)
+     2. head and tail blocks of files of the same size
+     3. full content hash of files with matching blocks
+
+    Groups are yielded as soon as they are confirmed, so processing
+    can start before the whole library is checked. Hard links to the
+    same file are not reported as duplicates.
+
+    Args:
+        *roots (str):
+            Directories to crawl (recursively)
+
+        exts (list[str]):
+            Check only files with these extensions
+
+        hidden (bool):
+            Check hidden (dot)files too (default: False)
+
+        min_size (int):
+            Ignore files smaller than this (default: 1, i.e. skip empty files)
+
+        workers (int):
+            Number of files read in parallel (default: 4)
+
+        block_size (int):
+            Size of the compared head and tail blocks (default: 64 KiB)
+
+    Yields:
+        list[FileObject]: files with the same content
+    """
+    by_size: dict[int, list[FileObject]] = defaultdict(list)
+    seen_paths: set[str] = set()
+    total_size = 0
+    for root in roots:
+        for file_object in get_files(root, recursive=True, hidden=hidden, exts=exts):
+            real_path = os.path.realpath(file_object.path)
+            if real_path in seen_paths:  # overlapping roots
+                continue
+            seen_paths.add(real_path)
+            size = file_object.size
+            total_size += size
+            if size >= min_size:
+                by_size[size].append(file_object)
+
+    # largest groups first, they are likely to save the most space
+    size_groups = [
+        _without_hardlinks(files) for files in by_size.values() if len(files) > 1
+    ]
+    size_groups = [files for files in size_groups if len(files) > 1]
+    size_groups.sort(key=lambda files: files[0].size * len(files), reverse=True)
+    del by_size, seen_paths
+    bytes_read = 0
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        # stage 2: head and tail blocks. Each size group is resolved as soon
+        # as all its files are fingerprinted: groups of files covered
+        # entirely by the fingerprint are confirmed, the others are hashed.
+        # stage 3: full hashes. A group is yielded as soon as all its files
+        # are hashed.
+        futures: dict[Future, tuple[str, int, FileObject]] = {}
+        pending: dict[int, int] = {}
+        fingerprints: dict[int, dict[bytes, list[FileObject]]] = {}
+        hashes: dict[int, dict[bytes, list[FileObject]]] = {}
+        group_ids = itertools.count()
+
+        for files in size_groups:
+            group_id = next(group_ids)
+            pending[group_id] = len(files)
+            fingerprints[group_id] = defaultdict(list)
+            for file_object in files:
+                future = executor.submit(_fingerprint, file_object, block_size)
+                futures[future] = ("fingerprint", group_id, file_object)
+        del size_groups
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, group_id, file_object = futures.pop(future)
+                try:
+                    digest = future.result()
+                except OSError:
+                    logging.warning("Unable to read", file_object.path)
+                else:
+                    if stage == "fingerprint":
+                        bytes_read += min(file_object.size, block_size * 2)
+                        fingerprints[group_id][digest].append(file_object)
+                    else:
+                        bytes_read += file_object.size
+                        hashes[group_id][digest].append(file_object)
+                pending[group_id] -= 1
+                if pending[group_id]:
+                    continue
+                del pending[group_id]
+
+                if stage == "hash":
+                    for files in hashes.pop(group_id).values():
+                        if len(files) > 1:
+                            yield files
+                    continue
+
+                for files in fingerprints.pop(group_id).values():
+                    if len(files) < 2:
+                        continue
+                    if files[0].size <= block_size * 2:
+                        yield files
+                        continue
+                    hash_group_id = next(group_ids)
+                    pending[hash_group_id] = len(files)
+                    hashes[hash_group_id] = defaultdict(list)
+                    for file_object in files:
+                        future = executor.submit(_full_hash, file_object)
+                        futures[future] = ("hash", hash_group_id, file_object)
+    finally:
+        # the consumer may stop early: do not read the rest
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    metrics.inc("nxtools_duplicates_bytes_read_total", bytes_read)
+    logging.debug(
+        "Duplicate search read",
+        format_filesize(bytes_read) or "0 bytes",
+        "of",
+        format_filesize(total_size) or "0 bytes",
+    )
@@ -11,12 +11,16 @@ __all__ = [
     "get_file_siblings",
 ]
 
+import contextlib
+import mmap
 import os
 import stat
 import tempfile
+from collections.abc import Iterator
 
 from .common import get_guid
 from .logging import log_traceback
+from .metrics import metrics
 from .text import slugify
 
 
@@ -144,6 +148,90 @@ class FileObject:
         """Return a file-like object opened with the specified mode."""
         return open(self.path, mode, **kwargs)
 
+    @contextlib.contextmanager
+    def mmap(self) -> Iterator[mmap.mmap | bytes]:
+        """Map the file into memory (read-only).
+
+        The yielded object supports slicing, `find()` and the buffer
+        protocol. Pages are loaded on access, so random reads of a large
+        file do not copy it. An empty file yields an empty bytes object
+        (empty files cannot be mapped).
+
+        ```python
+        with FileObject("video.ts").mmap() as data:
+            pos = data.find(b"\\x47", 1024)
+        ```
+        """
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+
+    def iter_chunks(
+        self,
+        size: int = 1024 * 1024,
+        offset: int = 0,
+        length: int | None = None,
+    ) -> Iterator[memoryview]:
+        """Read the file sequentially in chunks.
+
+        A single buffer of `size` bytes is allocated and filled using
+        `readinto`, so no memory is allocated per chunk. Each yielded
+        memoryview is valid only until the next chunk is requested:
+        copy it (`bytes(chunk)`) if it needs to be kept.
+
+        Args:
+            size (int):
+                Chunk size in bytes (default: 1 MiB)
+
+            offset (int):
+                Start reading at this position (default: 0)
+
+            length (int):
+                Read at most this number of bytes (default: until the end)
+        """
+        buffer = memoryview(bytearray(size))
+        remaining = length
+        with open(self.path, "rb", buffering=0) as f:
+            if offset:
+                f.seek(offset)
+            while remaining is None or remaining > 0:
+                target = buffer if remaining is None else buffer[: min(remaining, size)]
+                count = f.readinto(target)
+                if not count:
+                    break
+                if remaining is not None:
+                    remaining -= count
+                yield buffer[:count]
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """Return `length` bytes starting at `offset`.
+
+        Uses `os.pread` where available (a single positioned read,
+        no seek). Fewer bytes are returned if the file ends earlier.
+        For many small random reads of the same file, use `mmap()`.
+        """
+        with open(self.path, "rb", buffering=0) as f:
+            if not hasattr(os, "pread"):  # Windows
+                f.seek(offset)
+                return f.read(length) or b""
+            fd = f.fileno()
+            data = os.pread(fd, length, offset)
+            if len(data) == length or not data:
+                return data
+            # short read (e.g. network filesystems): collect the rest
+            parts = [data]
+            received = len(data)
+            while received < length:
+                data = os.pread(fd, length - received, offset + received)
+                if not data:
+                    break
+                parts.append(data)
+                received += len(data)
+            return b"".join(parts)
+
 
 def join_path(*args):
     elms = []
@@ -194,11 +282,17 @@ def get_files(
     if strip_path is None:
         strip_path = base_path
 
-    if os.path.exists(base_path):
+    if not os.path.exists(base_path):
+        return
+
+    stats = 0
+    crawled = 0
+    try:
         for dir_entry in os.scandir(base_path):
             file_name = dir_entry.name
             file_path = dir_entry.path
             stat_result = dir_entry.stat()
+            stats += 1
 
             file_object = FileObject(
                 file_path,
@@ -221,6 +315,7 @@ def get_files(
                     ext = ext.lower()
                 if exts and ext not in exts:
                     continue
+                crawled += 1
                 if relative_path:
                     file_object.path = file_object.path.replace(
                         strip_path, "", 1
@@ -239,6 +334,10 @@ def get_files(
                     strip_path=strip_path,
                 ):
                     yield file_object
+    finally:
+        if metrics.enabled:
+            metrics.inc("nxtools_get_files_stats_total", stats)
+            metrics.inc("nxtools_get_files_crawled_total", crawled)
 
 
 def get_path_pairs(
@@ -1,19 +1,44 @@
+import abc
+import atexit
+import collections
 import contextlib
-import logging as _logging
+import os
+import queue
+import re
 import sys
+import threading
 import time
-import traceback
-
-import colorama
+from collections.abc import Callable
+from typing import Any, Literal, NamedTuple, TextIO
 
+from .metrics import metrics
 from .text import indent
 from .timeutils import format_time
 
-colorama.init()
 
-SBB = colorama.Style.BRIGHT + colorama.Fore.BLACK
-SR = colorama.Style.RESET_ALL
-SN = colorama.Style.NORMAL
+class Style:
+    """ANSI style codes (same as `colorama.Style`)."""
+
+    BRIGHT = "\033[1m"
+    NORMAL = "\033[22m"
+    RESET_ALL = "\033[0m"
+
+
+class Fore:
+    """ANSI foreground color codes (same as `colorama.Fore`)."""
+
+    BLACK = "\033[30m"
+    RED = "\033[31m"
+    GREEN = "\033[32m"
+    YELLOW = "\033[33m"
+    BLUE = "\033[34m"
+    WHITE = "\033[37m"
+    RESET = "\033[39m"
+
+
+SBB = Style.BRIGHT + Fore.BLACK
+SR = Style.RESET_ALL
+SN = Style.NORMAL
 
 TRACE = 0
 DEBUG = 10
@@ -31,55 +56,605 @@ FMT_COLORAMA = {
     + "{timestamp}"
     + "TRACE".ljust(LEVEL_WIDTH)
     + "{user} {message}"
-    + colorama.Style.RESET_ALL,
+    + Style.RESET_ALL,
     DEBUG: SBB
     + "{timestamp}"
-    + colorama.Style.RESET_ALL
-    + colorama.Fore.BLUE
+    + Style.RESET_ALL
+    + Fore.BLUE
     + "DEBUG".ljust(LEVEL_WIDTH)
     + "{user} {message}"
-    + colorama.Style.RESET_ALL,
+    + Style.RESET_ALL,
     INFO: SBB
     + "{timestamp}"
-    + colorama.Style.NORMAL
-    + colorama.Fore.WHITE
+    + Style.NORMAL
+    + Fore.WHITE
     + "INFO ".ljust(LEVEL_WIDTH)
-    + colorama.Fore.RESET
+    + Fore.RESET
     + "{user} {message}"
-    + colorama.Style.RESET_ALL,
+    + Style.RESET_ALL,
     WARNING: SBB
     + "{timestamp}"
-    + colorama.Style.NORMAL
-    + colorama.Fore.YELLOW
+    + Style.NORMAL
+    + Fore.YELLOW
     + "WARNING ".ljust(LEVEL_WIDTH)
-    + colorama.Fore.RESET
+    + Fore.RESET
     + "{user} {message}"
-    + colorama.Style.RESET_ALL,
+    + Style.RESET_ALL,
     ERROR: SBB
     + "{timestamp}"
-    + colorama.Style.NORMAL
-    + colorama.Fore.RED
+    + Style.NORMAL
+    + Fore.RED
     + "ERROR".ljust(LEVEL_WIDTH)
-    + colorama.Fore.RESET
+    + Fore.RESET
     + "{user} {message}"
-    + colorama.Style.RESET_ALL,
+    + Style.RESET_ALL,
     CRITICAL: SBB
     + "{timestamp}"
-    + colorama.Style.NORMAL
-    + colorama.Fore.RED
+    + Style.NORMAL
+    + Fore.RED
     + "CRITICAL ".ljust(LEVEL_WIDTH)
     + "{user} {message}"
-    + colorama.Style.RESET_ALL,
+    + Style.RESET_ALL,
     GOOD_NEWS: SBB
     + "{timestamp}"
-    + colorama.Style.NORMAL
-    + colorama.Fore.GREEN
+    + Style.NORMAL
+    + Fore.GREEN
     + "GOOD NEWS ".ljust(LEVEL_WIDTH)
-    + colorama.Fore.RESET
+    + Fore.RESET
     + "{user} {message}"
-    + colorama.Style.RESET_ALL,
+    + Style.RESET_ALL,
+}
+
+LEVEL_NAMES = {
+    TRACE: "TRACE",
+    DEBUG: "DEBUG",
+    INFO: "INFO",
+    GOOD_NEWS: "GOOD NEWS",
+    WARNING: "WARNING",
+    ERROR: "ERROR",
+    CRITICAL: "CRITICAL",
+}
+
+FMT_PLAIN = {
+    level: "{timestamp}" + name.ljust(LEVEL_WIDTH) + "{user} {message}"
+    for level, name in LEVEL_NAMES.items()
 }
 
+JSON_LEVEL_NAMES = {
+    level: name.lower().replace(" ", "_") for level, name in LEVEL_NAMES.items()
+}
+
+# Core keys of JSON records, which extra context cannot override
+JSON_RESERVED_KEYS = frozenset(["timestamp", "level", "user", "message"])
+
+_json_encoder = None
+_colorama_initialized = False
+
+
+def _init_colorama() -> None:
+    """Initialize colorama (once) to support ANSI colors on Windows.
+
+    This is deferred until the first colored write to a terminal,
+    so importing nxtools does not pay for it.
+    """
+    global _colorama_initialized
+    if _colorama_initialized:
+        return
+    _colorama_initialized = True
+    with contextlib.suppress(ImportError):
+        import colorama
+
+        colorama.init()
+
+
+class Lazy:
+    """Log call argument rendered only when the message is logged.
+
+    Wraps a function and its arguments. The function is called
+    when the message passes the level threshold and rate limiting,
+    so expensive values cost nothing when the message is suppressed.
+
+    ```python
+    logging.debug("Executing", Lazy(" ".join, cmd))
+    ```
+    """
+
+    __slots__ = ("func", "args", "kwargs")
+
+    def __init__(self, func: Callable[..., Any], *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self) -> str:
+        return str(self.func(*self.args, **self.kwargs))
+
+    def __repr__(self) -> str:
+        return f"<Lazy {self.func!r}>"
+
+
+def format_message(args) -> str:
+    """Render log call arguments to a message string.
+
+    Arguments are joined using spaces. `Lazy` arguments
+    are evaluated at this point.
+    """
+    return " ".join([str(arg) for arg in args])
+
+
+OverflowPolicy = Literal["block", "drop_debug", "drop_oldest"]
+
+
+class LogRecord(NamedTuple):
+    """A single log message."""
+
+    timestamp: float
+    level: int
+    user: str | None
+    message: str
+    handlers: bool = True
+    extra: dict[str, Any] | None = None
+
+
+def format_json(record: LogRecord) -> str:
+    """Serialize a log record to a single-line JSON object.
+
+    Keys are `timestamp` (unix time), `level`, `user` and `message`,
+    followed by extra context passed to the log call as keyword arguments.
+    Extra keys colliding with these are prefixed with `extra_`.
+    """
+    data = {
+        "timestamp": record.timestamp,
+        "level": JSON_LEVEL_NAMES.get(record.level, str(record.level)),
+        "user": record.user,
+        "message": record.message,
+    }
+    if record.extra:
+        for key, value in record.extra.items():
+            if key in JSON_RESERVED_KEYS:
+                key = f"extra_{key}"
+            data[key] = value
+    global _json_encoder
+    if _json_encoder is None:
+        import json
+
+        _json_encoder = json.JSONEncoder(
+            separators=(",", ":"),
+            ensure_ascii=False,
+            check_circular=False,
+            default=str,
+        )
+    return _json_encoder.encode(data)
+
+
+re_rotated = re.compile(r"(\d{8}-\d{6})(?:-(\d+))?(?:\.gz)?")
+
+
+class Sink(abc.ABC):
+    """Base class for log outputs.
+
+    A sink receives batches of pre-formatted lines. Records are formatted
+    once per batch for each format in use, regardless of how many
+    sinks share it.
+
+    Args:
+        format (str):
+            "text" for the human-readable format, "json" for one JSON
+            object per line (default: "text")
+
+        level (int):
+            Minimum level of records written to the sink (default: TRACE)
+
+        colors (bool):
+            Use ANSI colors in the text format (default: False)
+    """
+
+    def __init__(
+        self,
+        format: Literal["text", "json"] = "text",
+        level: int = TRACE,
+        colors: bool = False,
+    ):
+        if format not in ("text", "json"):
+            raise ValueError(f"Invalid sink format: {format}")
+        self.format = format
+        self.level = level
+        self.colors = colors
+
+    def wants_colors(self) -> bool:
+        """Return `True` if the text format should be colored."""
+        return self.colors
+
+    @abc.abstractmethod
+    def write(self, lines: list[str]) -> None:
+        """Write a batch of formatted lines."""
+
+    def flush(self) -> None:
+        """Flush buffered output."""
+
+    def close(self) -> None:
+        """Flush and release the resources used by the sink."""
+        self.flush()
+
+
+class StreamSink(Sink):
+    """Write log records to a file-like object.
+
+    If no stream is specified, the current `sys.stderr` is used.
+    Each batch of records is written using a single `write` call.
+    Colors are used only if the stream is a terminal.
+    """
+
+    def __init__(self, stream=None, **kwargs):
+        super().__init__(**kwargs)
+        self.stream = stream
+        self._tty_stream = None
+        self._tty = False
+
+    def wants_colors(self) -> bool:
+        if not self.colors:
+            return False
+        stream = self.stream or sys.stderr
+        if stream is not self._tty_stream:
+            self._tty = False
+            with contextlib.suppress(Exception):
+                self._tty = stream.isatty()
+            if self._tty:
+                _init_colorama()
+            # colorama may replace sys.stderr, so re-read it
+            self._tty_stream = self.stream or sys.stderr
+        return self._tty
+
+    def write(self, lines: list[str]) -> None:
+        stream = self.stream or sys.stderr
+        stream.write("\n".join(lines) + "\n")
+
+    def flush(self) -> None:
+        stream = self.stream or sys.stderr
+        stream.flush()
+
+
+class FileSink(Sink):
+    """Write log records to a file with buffering and rotation.
+
+    Writing threads only append formatted batches to a buffer.
+    The buffer is written to the file when it exceeds `buffer_size`,
+    every `flush_interval` seconds (from a background thread)
+    and when `flush()` is called.
+
+    Rotated files are renamed to `{path}.{YYYYMMDD-HHMMSS}`
+    and optionally gzipped in a background thread.
+
+    Args:
+        path (str):
+            Path to the log file
+
+        max_bytes (int):
+            Rotate when the file exceeds this size (default: 0 - never)
+
+        rotate_interval (float):
+            Rotate after this number of seconds (default: 0 - never)
+
+        backup_count (int):
+            Number of rotated files to keep (default: 7, 0 keeps all)
+
+        compress (bool):
+            Gzip rotated files (default: False)
+
+        buffer_size (int):
+            Write the buffer when it exceeds this number of characters
+            (default: 65536)
+
+        flush_interval (float):
+            Maximum time (in seconds) records stay in the buffer
+            (default: 1)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 0,
+        rotate_interval: float = 0,
+        backup_count: int = 7,
+        compress: bool = False,
+        buffer_size: int = 65536,
+        flush_interval: float = 1,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._buffer: collections.deque[str] = collections.deque()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._file: TextIO | None = None
+        self._next_rotation = 0.0
+        self._closed = threading.Event()
+        self._flusher: threading.Thread | None = None
+
+    def write(self, lines: list[str]) -> None:
+        chunk = "\n".join(lines) + "\n"
+        self._buffer.append(chunk)
+        self._pending += len(chunk)
+        if self._flusher is None:
+            self._start_flusher()
+        if self._pending >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._buffer:
+                return
+            chunks = []
+            with contextlib.suppress(IndexError):
+                while True:
+                    chunks.append(self._buffer.popleft())
+            self._pending = 0
+            if self._file is None:
+                self._open()
+            assert self._file is not None
+            self._file.write("".join(chunks))
+            self._file.flush()
+            if self._should_rotate():
+                self._rotate()
+
+    def close(self) -> None:
+        self._closed.set()
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _start_flusher(self) -> None:
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(
+                target=self._flush_loop,
+                name="nxtools-log-flush",
+                daemon=True,
+            )
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            with contextlib.suppress(Exception):
+                self.flush()
+
+    def _open(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self.rotate_interval:
+            self._next_rotation = time.time() + self.rotate_interval
+
+    def _should_rotate(self) -> bool:
+        assert self._file is not None
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            return True
+        if self.rotate_interval and time.time() >= self._next_rotation:
+            return True
+        return False
+
+    def _rotate(self) -> None:
+        assert self._file is not None
+        self._file.close()
+        self._file = None
+        suffix = time.strftime("%Y%m%d-%H%M%S")
+        target = f"{self.path}.{suffix}"
+        i = 1
+        while os.path.exists(target) or os.path.exists(target + ".gz"):
+            target = f"{self.path}.{suffix}-{i}"
+            i += 1
+        os.rename(self.path, target)
+        self._open()
+        if self.compress:
+            threading.Thread(
+                target=self._compress,
+                args=(target,),
+                name="nxtools-log-compress",
+                daemon=True,
+            ).start()
+        else:
+            self._prune()
+
+    def _compress(self, path: str) -> None:
+        import gzip
+        import shutil
+
+        with contextlib.suppress(Exception):
+            with open(path, "rb") as src, gzip.open(f"{path}.gz.tmp", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(f"{path}.gz.tmp", f"{path}.gz")
+            os.remove(path)
+        self._prune()
+
+    def _prune(self) -> None:
+        import glob
+
+        if not self.backup_count:
+            return
+        rotated = []
+        for path in glob.glob(glob.escape(self.path) + ".*"):
+            match = re_rotated.fullmatch(path[len(self.path) + 1 :])
+            if match:
+                stamp, counter = match.group(1), int(match.group(2) or 0)
+                rotated.append((stamp, counter, path))
+        rotated.sort()
+        for _, _, path in rotated[: -self.backup_count]:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+
+class RateLimiter:
+    """Per-key token bucket limiter for log messages.
+
+    Each key (level, user and message template) gets a bucket holding
+    up to `burst` tokens, refilled at `rate` tokens per second.
+    A message consumes one token. Messages arriving at an empty bucket
+    are only counted, and reported later as a single summary.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        # key -> [tokens, last update, suppressed count, last suppressed args]
+        self.buckets: dict[tuple, list] = {}
+        self.lock = threading.Lock()
+
+    def check(self, key: tuple, args: tuple, now: float) -> tuple[bool, int, tuple]:
+        """Consume a token for the given key.
+
+        Returns:
+            tuple: (allowed, suppressed, last_args). When the message
+            is allowed and previous ones were suppressed, `suppressed`
+            is their count and `last_args` the arguments of the last one.
+        """
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                if len(self.buckets) >= self.max_keys:
+                    self._evict(now)
+                self.buckets[key] = [self.burst - 1, now, 0, ()]
+                return True, 0, ()
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                bucket[2] += 1
+                bucket[3] = args
+                return False, 0, ()
+            bucket[0] = tokens - 1
+            suppressed, last_args = bucket[2], bucket[3]
+            bucket[2], bucket[3] = 0, ()
+            return True, suppressed, last_args
+
+    def pending(self, now: float, force: bool = False) -> list[tuple]:
+        """Return and reset suppressed counts of keys that may log again.
+
+        Returns:
+            list: (key, suppressed, last_args) tuples
+        """
+        result = []
+        with self.lock:
+            for key, bucket in self.buckets.items():
+                if not bucket[2]:
+                    continue
+                tokens = bucket[0] + (now - bucket[1]) * self.rate
+                if force or tokens >= 1:
+                    result.append((key, bucket[2], bucket[3]))
+                    bucket[2], bucket[3] = 0, ()
+        return result
+
+    def _evict(self, now: float) -> None:
+        """Drop idle keys (full buckets without suppressed messages)."""
+        idle = [
+            key
+            for key, bucket in self.buckets.items()
+            if not bucket[2] and bucket[0] + (now - bucket[1]) * self.rate >= self.burst
+        ]
+        for key in idle or list(self.buckets)[: len(self.buckets) // 2]:
+            del self.buckets[key]
+
+
+class HandlerWorker:
+    """Deliver log records to a handler from a dedicated thread.
+
+    Records are put to a bounded queue without blocking. When the queue
+    is full, the record is dropped and counted in `dropped`. Exceptions
+    raised by the handler are printed to stderr and counted in `errors`,
+    so they never propagate to the code that logged the message.
+
+    Regular handlers are called with `user`, `message_type` and `message`
+    keyword arguments for each record. Batch handlers are called
+    with a list of `LogRecord` objects.
+    """
+
+    def __init__(
+        self,
+        handler,
+        level: int = TRACE,
+        batch: bool = False,
+        queue_size: int = 1000,
+        batch_size: int = 100,
+    ):
+        self.handler = handler
+        self.level = level
+        self.batch = batch
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.errors = 0
+        self.stopped = False
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.thread = threading.Thread(
+            target=self._run,
+            name=f"nxtools-handler-{getattr(handler, '__name__', 'handler')}",
+            daemon=True,
+        )
+        self.thread.start()
+
+    def put(self, record: LogRecord) -> None:
+        """Enqueue a record. Never blocks."""
+        if self.stopped or record.level < self.level:
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Block until all queued records are handled."""
+        if not self.stopped:
+            self.queue.join()
+
+    def stop(self, timeout: float | None = 5) -> None:
+        """Handle queued records and stop the worker thread."""
+        if self.stopped:
+            return
+        self.stopped = True
+        with contextlib.suppress(queue.Full):
+            self.queue.put(None, timeout=timeout)
+        self.thread.join(timeout)
+
+    def _call(self, *args, **kwargs) -> None:
+        try:
+            self.handler(*args, **kwargs)
+        except Exception:
+            self.errors += 1
+            with contextlib.suppress(Exception):
+                import traceback
+
+                traceback.print_exc(file=sys.stderr)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            with contextlib.suppress(queue.Empty):
+                while len(batch) < self.batch_size:
+                    batch.append(self.queue.get_nowait())
+            records = [record for record in batch if record is not None]
+            if self.batch and records:
+                self._call(records)
+            elif records:
+                for record in records:
+                    self._call(
+                        user=record.user,
+                        message_type=record.level,
+                        message=record.message,
+                    )
+            for _ in batch:
+                self.queue.task_done()
+            if len(records) != len(batch):
+                return
+
 
 class Logging:
     """nxtools universal logger."""
@@ -87,11 +662,31 @@ class Logging:
     user: str | None = None
     show_user: bool = True
     show_time: bool = True
+    level: int = TRACE
+    user_levels: dict[str, int]
+    handlers: list[HandlerWorker]
+    sinks: list[Sink]
+    _limiter: RateLimiter | None
+    overflow: OverflowPolicy
+    _queue: queue.Queue | None
+    _writer: threading.Thread | None
 
     def __init__(self):
         self.show_time = True
         self.show_colors = True
         self.handlers = []
+        self.console = StreamSink(colors=True)
+        self.sinks = [self.console]
+        self.user_levels = {}
+        self._threshold = self.level
+        self._limiter = None
+        self._last_sweep = 0.0
+        self.overflow = "block"
+        self.batch_size = 256
+        self.dropped = 0
+        self._queue = None
+        self._writer = None
+        self._atexit_registered = False
 
     def install(self):
         """Use this logger as the default logger.
@@ -101,6 +696,8 @@ class Logging:
         format, colorizes the output and adds a custom handler
         support.
         """
+        import logging as _logging
+
         logger = _logging.getLogger()
         logger.setLevel(DEBUG)
 
@@ -114,69 +711,434 @@ class Logging:
 
         logger.addHandler(CustomHandler())
 
-    def add_handler(self, handler):
-        """Add a new logging handler."""
-        if handler not in self.handlers:
-            self.handlers.append(handler)
+    def add_handler(
+        self,
+        handler,
+        level: int = TRACE,
+        batch: bool = False,
+        queue_size: int = 1000,
+        batch_size: int = 100,
+    ) -> HandlerWorker | None:
+        """Add a new logging handler.
 
-    def _send(self, level, *args, **kwargs):
-        message = " ".join([str(arg) for arg in args])
-        user = kwargs.get("user", self.user)
+        Each handler runs in its own thread and receives records
+        through a bounded queue, so a slow or failing handler
+        never blocks or breaks the code that logs.
+
+        Args:
+            handler (callable):
+                Called as `handler(user=..., message_type=..., message=...)`
+                for each record, or `handler(records)` in batch mode
+
+            level (int):
+                Minimum level of records passed to the handler
+                (default: TRACE)
+
+            batch (bool):
+                Pass a list of `LogRecord` objects to the handler
+                instead of calling it for each record (default: False)
+
+            queue_size (int):
+                Maximum number of pending records.
+                When the queue is full, new records are dropped
+                and counted in the `dropped` attribute of the worker.
+                (default: 1000)
+
+            batch_size (int):
+                Maximum number of records handled at once (default: 100)
+
+        Returns:
+            HandlerWorker: the worker wrapping the handler
+            (or None if the handler was already added)
+        """
+        if any(worker.handler is handler for worker in self.handlers):
+            return None
+        worker = HandlerWorker(
+            handler,
+            level=level,
+            batch=batch,
+            queue_size=queue_size,
+            batch_size=batch_size,
+        )
+        self.handlers.append(worker)
+        self._register_atexit()
+        return worker
+
+    def remove_handler(self, handler) -> None:
+        """Remove a logging handler, delivering its pending records first."""
+        for worker in self.handlers:
+            if worker.handler is handler:
+                self.handlers.remove(worker)
+                worker.stop()
+                return
+
+    def add_sink(self, sink: Sink) -> None:
+        """Add an output (for example a JSON log file) to the logger.
+
+        By default, the logger has a single text sink writing
+        to stderr, which is accessible as the `console` attribute.
+        """
+        if sink not in self.sinks:
+            self.sinks.append(sink)
+            self._register_atexit()
+
+    def remove_sink(self, sink: Sink) -> None:
+        """Remove an output from the logger and close it."""
+        if sink in self.sinks:
+            self.sinks.remove(sink)
+            sink.close()
+
+    def set_level(self, level: int, user: str | None = None) -> None:
+        """Set the minimum level of logged messages.
+
+        Messages below the threshold are discarded
+        before any formatting takes place.
+
+        Args:
+            level (int):
+                Minimum level (e.g. `nxtools.logging.INFO`)
 
+            user (str):
+                If specified, the threshold applies only to messages
+                of the given user, overriding the global one.
+        """
+        if user is None:
+            self.level = level
+        else:
+            self.user_levels[user] = level
+        self._threshold = min([self.level, *self.user_levels.values()])
+
+    def reset_level(self, user: str) -> None:
+        """Remove a per-user level override."""
+        self.user_levels.pop(user, None)
+        self._threshold = min([self.level, *self.user_levels.values()])
+
+    def set_rate_limit(self, rate: float | None, burst: int = 10) -> None:
+        """Limit the rate of repeated messages.
+
+        Messages are grouped by level, user and template (the first
+        argument of the log call, so `logging.warning("Failed", path)`
+        shares one limit for all paths). Each group may log `burst`
+        messages at once and then `rate` messages per second. Messages
+        over the limit are discarded before formatting, and their count
+        is reported in a single "repeated N times" message as soon as
+        the group is allowed to log again.
+
+        Args:
+            rate (float):
+                Sustained number of messages per second per group.
+                `None` disables rate limiting.
+
+            burst (int):
+                Number of messages allowed at once (default: 10)
+        """
+        self.flush_repeated(force=True)
+        self._limiter = None if rate is None else RateLimiter(rate, burst)
+        if rate is not None:
+            self._register_atexit()
+
+    def flush_repeated(self, force: bool = False) -> None:
+        """Log "repeated N times" summaries of suppressed messages.
+
+        By default, only groups allowed to log again are reported.
+        Use `force` to report all of them.
+        """
+        limiter = self._limiter
+        if limiter is None:
+            return
+        now = time.time()
+        self._last_sweep = now
+        for key, suppressed, last_args in limiter.pending(now, force=force):
+            self._send_repeated(key, suppressed, last_args)
+
+    def _send_repeated(self, key: tuple, suppressed: int, last_args: tuple) -> None:
+        level, user, _ = key
+        message = format_message(last_args)
+        self._dispatch(
+            LogRecord(
+                time.time(),
+                level,
+                user,
+                f"Message repeated {suppressed} times: {message}",
+            )
+        )
+
+    def is_enabled_for(self, level: int, user: str | None = None) -> bool:
+        """Return `True` if a message of the given level would be logged."""
+        if level < self._threshold:
+            return False
+        if user is None:
+            user = self.user
+        if self.user_levels and user in self.user_levels:
+            return level >= self.user_levels[user]
+        return level >= self.level
+
+    #
+    # Background mode
+    #
+
+    def start_background(
+        self,
+        queue_size: int = 10000,
+        overflow: OverflowPolicy = "block",
+        batch_size: int = 256,
+    ) -> None:
+        """Format and write log messages in a background thread.
+
+        Log calls only enqueue a record, and a writer thread formats
+        queued records and writes them to stderr in batches,
+        so a slow stderr consumer does not stall the logging threads.
+
+        Args:
+            queue_size (int):
+                Maximum number of queued records (default: 10000)
+
+            overflow (str):
+                What to do when the queue is full.
+                "block" waits for a free slot,
+                "drop_debug" discards debug and trace messages
+                (other messages wait) and
+                "drop_oldest" discards the oldest queued record.
+                (default: "block")
+
+            batch_size (int):
+                Maximum number of records written at once (default: 256)
+        """
+        if overflow not in ("block", "drop_debug", "drop_oldest"):
+            raise ValueError(f"Invalid overflow policy: {overflow}")
+        if self._queue is not None:
+            self.stop_background()
+        self.overflow = overflow
+        self.batch_size = batch_size
+        log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._writer = threading.Thread(
+            target=self._writer_loop,
+            args=(log_queue,),
+            name="nxtools-logging",
+            daemon=True,
+        )
+        self._writer.start()
+        self._queue = log_queue
+        self._register_atexit()
+
+    def stop_background(self, timeout: float | None = 5) -> None:
+        """Write all queued records and stop the background thread."""
+        log_queue, writer = self._queue, self._writer
+        if log_queue is None or writer is None:
+            return
+        self._queue = None
+        self._writer = None
+        log_queue.put(None)
+        writer.join(timeout)
+
+    def flush(self) -> None:
+        """Block until all queued records are written and handled."""
+        self.flush_repeated()
+        if self._queue is not None:
+            self._queue.join()
+        for worker in self.handlers:
+            worker.flush()
+        self._flush_sinks()
+
+    def shutdown(self) -> None:
+        """Stop the background writer and handler threads.
+
+        Pending records are written and handled first.
+        This method is called automatically at exit.
+        """
+        self.flush_repeated(force=True)
+        self.stop_background()
+        handlers, self.handlers = self.handlers, []
+        for worker in handlers:
+            worker.stop()
+        for sink in self.sinks:
+            with contextlib.suppress(Exception):
+                sink.close()
+
+    def _register_atexit(self) -> None:
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def _enqueue(self, log_queue: queue.Queue, record: LogRecord) -> None:
+        if self.overflow == "block" or (
+            self.overflow == "drop_debug" and record.level > DEBUG
+        ):
+            log_queue.put(record)
+            return
+        while True:
+            try:
+                log_queue.put_nowait(record)
+                return
+            except queue.Full:
+                self.dropped += 1
+                if self.overflow == "drop_debug":
+                    return
+            # drop_oldest
+            with contextlib.suppress(queue.Empty):
+                log_queue.get_nowait()
+                log_queue.task_done()
+
+    def _writer_loop(self, log_queue: queue.Queue) -> None:
+        while True:
+            batch = [log_queue.get()]
+            with contextlib.suppress(queue.Empty):
+                while len(batch) < self.batch_size:
+                    batch.append(log_queue.get_nowait())
+            records = [record for record in batch if record is not None]
+            try:
+                self._emit(records)
+                self._flush_sinks()
+            except Exception:
+                with contextlib.suppress(Exception):
+                    import traceback
+
+                    traceback.print_exc(file=sys.stderr)
+            for _ in batch:
+                log_queue.task_done()
+            if len(records) != len(batch):
+                return
+
+    #
+    # Formatting and output
+    #
+
+    def _format(self, record: LogRecord, colors: bool = True) -> str:
+        user = record.user
         if user is None or not self.show_user:
             user = ""
         else:
             user = user.ljust(USER_WIDTH)
 
         if self.show_time:
-            timestamp = format_time(time.time()) + " "
+            timestamp = format_time(record.timestamp) + " "
         else:
             timestamp = ""
 
-        line = FMT_COLORAMA[level].format(
+        template = FMT_COLORAMA if colors and self.show_colors else FMT_PLAIN
+        return template[record.level].format(
             timestamp=timestamp,
             user=user,
-            message=message,
+            message=record.message,
         )
 
-        with contextlib.suppress(Exception):
-            print(line, file=sys.stderr)
+    def _emit(self, records: list[LogRecord]) -> None:
+        if not records:
+            return
+        formatted: dict[tuple[str, bool], list[str]] = {}
+        for sink in self.sinks:
+            key = (sink.format, sink.format == "text" and sink.wants_colors())
+            if sink.level > TRACE:
+                selected = [r for r in records if r.level >= sink.level]
+                if not selected:
+                    continue
+                lines = self._format_lines(selected, *key)
+            elif key in formatted:
+                lines = formatted[key]
+            else:
+                lines = formatted[key] = self._format_lines(records, *key)
+            with contextlib.suppress(Exception):
+                sink.write(lines)
+
+        if self.handlers:
+            for record in records:
+                if record.handlers:
+                    for worker in self.handlers:
+                        worker.put(record)
+
+    def _format_lines(
+        self,
+        records: list[LogRecord],
+        format: str,
+        colors: bool,
+    ) -> list[str]:
+        if format == "json":
+            return [format_json(record) for record in records]
+        return [self._format(record, colors) for record in records]
+
+    def _flush_sinks(self) -> None:
+        for sink in self.sinks:
+            with contextlib.suppress(Exception):
+                sink.flush()
 
-        if kwargs.get("handlers", True):
-            for handler in self.handlers:
-                handler(user=self.user, message_type=level, message=message)
+    def _send(self, level, /, *args, **kwargs):
+        user = kwargs.get("user", self.user)
+        if not self.is_enabled_for(level, user):
+            return
+        now = time.time()
+        limiter = self._limiter
+        if limiter is not None:
+            template = args[0] if args and isinstance(args[0], str) else ""
+            key = (level, user, template)
+            allowed, suppressed, last_args = limiter.check(key, args, now)
+            if suppressed:
+                self._send_repeated(key, suppressed, last_args)
+            if now - self._last_sweep >= 1:
+                self.flush_repeated()
+            if not allowed:
+                return
+        if metrics.enabled:
+            metrics.inc(
+                "nxtools_log_messages_total",
+                level=JSON_LEVEL_NAMES.get(level, level),
+            )
+        record = LogRecord(
+            now,
+            level,
+            user,
+            format_message(args),
+            kwargs.get("handlers", True),
+            {k: v for k, v in kwargs.items() if k not in ("user", "handlers")} or None,
+        )
+        self._dispatch(record)
+
+    def _dispatch(self, record: LogRecord) -> None:
+        log_queue = self._queue
+        if log_queue is not None and threading.current_thread() is not self._writer:
+            self._enqueue(log_queue, record)
+        else:
+            self._emit([record])
 
     def trace(self, *args, **kwargs):
         """Log a debug message."""
-        self._send(TRACE, *args, **kwargs)
+        if TRACE >= self._threshold:
+            self._send(TRACE, *args, **kwargs)
 
     def debug(self, *args, **kwargs):
         """Log a debug message."""
-        self._send(DEBUG, *args, **kwargs)
+        if DEBUG >= self._threshold:
+            self._send(DEBUG, *args, **kwargs)
 
     def info(self, *args, **kwargs):
         """Log an info message."""
-        self._send(INFO, *args, **kwargs)
+        if INFO >= self._threshold:
+            self._send(INFO, *args, **kwargs)
 
     def warning(self, *args, **kwargs):
         """Log a warning message."""
-        self._send(WARNING, *args, **kwargs)
+        if WARNING >= self._threshold:
+            self._send(WARNING, *args, **kwargs)
 
     def error(self, *args, **kwargs):
         """Log an error message."""
-        self._send(ERROR, *args, **kwargs)
+        if ERROR >= self._threshold:
+            self._send(ERROR, *args, **kwargs)
 
     def critical(self, *args, **kwargs):
         """Log a critical error message."""
-        self._send(CRITICAL, *args, **kwargs)
+        if CRITICAL >= self._threshold:
+            self._send(CRITICAL, *args, **kwargs)
 
     def goodnews(self, *args, **kwargs):
         """Log a good news message."""
-        self._send(GOOD_NEWS, *args, **kwargs)
+        if GOOD_NEWS >= self._threshold:
+            self._send(GOOD_NEWS, *args, **kwargs)
 
 
 def log_traceback(message="Exception!", **kwargs):
     """Log the current exception traceback."""
+    import traceback
+
     tb = traceback.format_exc()
     msg = f"{message}\n\n{indent(tb)}"
     logging.error(msg, **kwargs)
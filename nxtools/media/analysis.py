@@ -0,0 +1,284 @@
+__all__ = ["Loudness", "Detection", "AnalysisResult", "analyze"]
+
+import re
+import subprocess
+from collections.abc import Callable
+from typing import NamedTuple
+
+from nxtools.logging import logging
+from nxtools.media.ffmpeg import FFMPEG
+from nxtools.media.ffprobe import ffprobe
+from nxtools.text import indent
+
+
+class Loudness(NamedTuple):
+    """EBU R128 loudness summary."""
+
+    integrated: float  # LUFS
+    threshold: float  # LUFS
+    lra: float  # LU
+    lra_low: float  # LUFS
+    lra_high: float  # LUFS
+    true_peak: float | None = None  # dBTP
+
+
+class Detection(NamedTuple):
+    """A detected interval (silence, black or freeze) in seconds."""
+
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class AnalysisResult(NamedTuple):
+    duration: float
+    loudness: Loudness | None
+    silence: list[Detection]
+    black: list[Detection]
+    freeze: list[Detection]
+
+
+#
+# Output parsers
+#
+
+
+class LoudnessParser:
+    """Parse the summary printed by the ebur128 filter when it ends.
+
+    The summary is a single multi-line log message, so only its
+    first line carries the filter prefix.
+    """
+
+    re_value = re.compile(r"^(I|LRA|LRA low|LRA high|Threshold|Peak):\s+(\S+)")
+
+    def __init__(self) -> None:
+        self.in_summary = False
+        self.section = ""
+        self.values: dict[str, float] = {}
+
+    def parse_line(self, line: str) -> None:
+        if not self.in_summary:
+            self.in_summary = "ebur128" in line and line.endswith("Summary:")
+            return
+        if line.endswith(":") and not line.startswith("["):
+            self.section = line[:-1]  # "Integrated loudness", "True peak"...
+            return
+        match = self.re_value.match(line)
+        if not match:
+            return
+        key = match.group(1)
+        if key == "Threshold":
+            key = "LRA threshold" if self.section == "Loudness range" else key
+        try:
+            self.values[key] = float(match.group(2))  # accepts "-inf" too
+        except ValueError:
+            pass
+
+    @property
+    def result(self) -> Loudness | None:
+        if "I" not in self.values:
+            return None
+        return Loudness(
+            integrated=self.values["I"],
+            threshold=self.values.get("Threshold", 0.0),
+            lra=self.values.get("LRA", 0.0),
+            lra_low=self.values.get("LRA low", 0.0),
+            lra_high=self.values.get("LRA high", 0.0),
+            true_peak=self.values.get("Peak"),
+        )
+
+
+class IntervalParser:
+    """Collect start/end pairs reported by a detection filter."""
+
+    def __init__(self, filter_name: str, start_key: str, end_key: str):
+        self.filter_name = filter_name
+        self.re_start = re.compile(re.escape(start_key) + r":\s*(-?[\d.]+)")
+        self.re_end = re.compile(re.escape(end_key) + r":\s*(-?[\d.]+)")
+        self.start: float | None = None
+        self.intervals: list[Detection] = []
+
+    def parse_line(self, line: str) -> None:
+        if self.filter_name not in line:
+            return
+        match = self.re_start.search(line)
+        if match:
+            self.start = max(0.0, float(match.group(1)))
+        match = self.re_end.search(line)
+        if match and self.start is not None:
+            self.intervals.append(Detection(self.start, float(match.group(1))))
+            self.start = None
+
+    def result(self, end: float) -> list[Detection]:
+        """Return detected intervals, closing an open one at `end`."""
+        if self.start is not None and end > self.start:
+            return [*self.intervals, Detection(self.start, end)]
+        return list(self.intervals)
+
+
+class BlackParser(IntervalParser):
+    """blackdetect reports each interval on a single line."""
+
+    re_line = re.compile(r"black_start:\s*([\d.]+)\s+black_end:\s*([\d.]+)")
+
+    def __init__(self) -> None:
+        super().__init__("blackdetect", "black_start", "black_end")
+
+    def parse_line(self, line: str) -> None:
+        if self.filter_name not in line:
+            return
+        match = self.re_line.search(line)
+        if match:
+            start, end = float(match.group(1)), float(match.group(2))
+            self.intervals.append(Detection(start, end))
+
+
+#
+# Analysis
+#
+
+
+def analyze(
+    input_path: str,
+    loudness: bool = True,
+    silence: bool = True,
+    black: bool = True,
+    freeze: bool = True,
+    silence_threshold: float = -60,
+    silence_duration: float = 2,
+    black_threshold: float = 0.1,
+    black_duration: float = 2,
+    freeze_threshold: float = -60,
+    freeze_duration: float = 2,
+    audio_track: int = 0,
+    progress_handler: Callable[[float], None] | None = None,
+) -> AnalysisResult | None:
+    """Run selected QC analyses in a single ffmpeg pass.
+
+    All analysers share one filter graph, so the file is decoded once.
+    Audio analysers (loudness, silence) use the given audio track,
+    video analysers (black, freeze) the first video stream. Analysers
+    for missing stream types are skipped.
+
+    Args:
+        input_path (str):
+            Path to the media file
+
+        loudness (bool):
+            Measure EBU R128 loudness, loudness range and true peak
+
+        silence (bool), silence_threshold (float), silence_duration (float):
+            Detect silence below the threshold (dB)
+            lasting at least the given number of seconds
+
+        black (bool), black_threshold (float), black_duration (float):
+            Detect black frames (pixel threshold 0-1)
+            lasting at least the given number of seconds
+
+        freeze (bool), freeze_threshold (float), freeze_duration (float):
+            Detect frozen video (noise tolerance in dB)
+            lasting at least the given number of seconds
+
+        audio_track (int):
+            Index of the audio stream to analyse (default: 0)
+
+        progress_handler (function):
+            Called with the current position (seconds)
+
+    Returns:
+        AnalysisResult: analysis results or `None` on failure
+    """
+    meta = ffprobe(input_path, fast=True)
+    if not meta:
+        return None
+    streams = meta.get("streams", [])
+    audio_count = len([s for s in streams if s.get("codec_type") == "audio"])
+    has_audio = audio_count > audio_track
+    has_video = any(s.get("codec_type") == "video" for s in streams)
+
+    loudness_parser = LoudnessParser()
+    silence_parser = IntervalParser("silencedetect", "silence_start", "silence_end")
+    black_parser = BlackParser()
+    freeze_parser = IntervalParser(
+        "freezedetect",
+        "lavfi.freezedetect.freeze_start",
+        "lavfi.freezedetect.freeze_end",
+    )
+
+    audio_filters = []
+    video_filters = []
+    parsers: list[LoudnessParser | IntervalParser] = []
+    if has_audio and loudness:
+        # per-frame measurements are logged at verbose level,
+        # so only the summary reaches the output
+        audio_filters.append("ebur128=peak=true:framelog=verbose")
+        parsers.append(loudness_parser)
+    if has_audio and silence:
+        audio_filters.append(
+            f"silencedetect=n={silence_threshold}dB:d={silence_duration}"
+        )
+        parsers.append(silence_parser)
+    if has_video and black:
+        video_filters.append(f"blackdetect=d={black_duration}:pix_th={black_threshold}")
+        parsers.append(black_parser)
+    if has_video and freeze:
+        video_filters.append(f"freezedetect=n={freeze_threshold}dB:d={freeze_duration}")
+        parsers.append(freeze_parser)
+    if not parsers:
+        logging.warning("Nothing to analyze in", input_path)
+        return None
+
+    graph = []
+    outputs = []
+    if audio_filters:
+        graph.append(f"[0:a:{audio_track}]{','.join(audio_filters)}[aout]")
+        outputs.extend(["-map", "[aout]"])
+    if video_filters:
+        graph.append(f"[0:v:0]{','.join(video_filters)}[vout]")
+        outputs.extend(["-map", "[vout]"])
+
+    position = 0.0
+
+    def handle_progress(value: float) -> None:
+        nonlocal position
+        position = value
+        if progress_handler:
+            progress_handler(value)
+
+    def line_handler(line: str) -> None:
+        for parser in parsers:
+            parser.parse_line(line)
+
+    ff = FFMPEG(
+        "-i",
+        input_path,
+        "-filter_complex",
+        ";".join(graph),
+        *outputs,
+        "-f",
+        "null",
+        "-",
+    )
+    ff.start(stdin=subprocess.DEVNULL)
+    ff.wait(progress_handler=handle_progress, line_handler=line_handler)
+    if ff.return_code:
+        logging.error("Unable to analyze", f"{input_path}\n\n{indent(ff.error_log)}")
+        return None
+
+    try:
+        duration = float(meta.get("format", {}).get("duration", 0))
+    except ValueError:
+        duration = 0
+    duration = max(duration, position)
+
+    return AnalysisResult(
+        duration=duration,
+        loudness=loudness_parser.result,
+        silence=silence_parser.result(duration),
+        black=black_parser.result(duration),
+        freeze=freeze_parser.result(duration),
+    )
@@ -0,0 +1,275 @@
+__all__ = ["FFmpegCapabilities", "get_capabilities"]
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+import threading
+from typing import Any
+
+from nxtools.common import resolve_binary
+from nxtools.logging import logging
+
+CACHE_VERSION = 1
+
+re_version = re.compile(r"^\S+ version (\S+)")
+
+_cache: dict[tuple[str, float], "FFmpegCapabilities"] = {}
+_cache_lock = threading.Lock()
+
+
+class FFmpegCapabilities:
+    """Version and supported features of an ffmpeg (or ffprobe) binary.
+
+    Codec, filter and format names are stored in dictionaries
+    mapping a name to its type (codecs), I/O specification (filters)
+    or "D"/"E"/"DE" flags (formats: demuxing/muxing supported).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mtime: float,
+        version: str | None = None,
+        encoders: dict[str, str] | None = None,
+        decoders: dict[str, str] | None = None,
+        filters: dict[str, str] | None = None,
+        formats: dict[str, str] | None = None,
+        hwaccels: list[str] | None = None,
+    ):
+        self.path = path
+        self.mtime = mtime
+        self.version = version
+        self.encoders = encoders or {}
+        self.decoders = decoders or {}
+        self.filters = filters or {}
+        self.formats = formats or {}
+        self.hwaccels = hwaccels or []
+
+    def __repr__(self):
+        return f"<FFmpegCapabilities {self.path} {self.version}>"
+
+    @property
+    def version_tuple(self) -> tuple[int, ...]:
+        """Return the numeric part of the version (e.g. `(6, 1, 1)`).
+
+        Git builds (`N-113684-g...`) return an empty tuple.
+        """
+        if not self.version:
+            return ()
+        match = re.match(r"n?(\d+(?:\.\d+)*)", self.version)
+        if not match:
+            return ()
+        return tuple(int(e) for e in match.group(1).split("."))
+
+    def has_encoder(self, name: str) -> bool:
+        return name in self.encoders
+
+    def has_decoder(self, name: str) -> bool:
+        return name in self.decoders
+
+    def has_filter(self, name: str) -> bool:
+        return name in self.filters
+
+    def has_muxer(self, name: str) -> bool:
+        return "E" in self.formats.get(name, "")
+
+    def has_demuxer(self, name: str) -> bool:
+        return "D" in self.formats.get(name, "")
+
+    def has_hwaccel(self, name: str) -> bool:
+        return name in self.hwaccels
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "cache_version": CACHE_VERSION,
+            "path": self.path,
+            "mtime": self.mtime,
+            "version": self.version,
+            "encoders": self.encoders,
+            "decoders": self.decoders,
+            "filters": self.filters,
+            "formats": self.formats,
+            "hwaccels": self.hwaccels,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "FFmpegCapabilities":
+        return cls(
+            path=data["path"],
+            mtime=data["mtime"],
+            version=data.get("version"),
+            encoders=data.get("encoders"),
+            decoders=data.get("decoders"),
+            filters=data.get("filters"),
+            formats=data.get("formats"),
+            hwaccels=data.get("hwaccels"),
+        )
+
+
+#
+# Output parsers
+#
+
+CODEC_TYPES = {
+    "V": "video",
+    "A": "audio",
+    "S": "subtitle",
+    "D": "data",
+    "T": "attachment",
+}
+
+
+def parse_codecs(output: str) -> dict[str, str]:
+    """Parse `ffmpeg -encoders` or `ffmpeg -decoders` output."""
+    result = {}
+    started = False
+    for line in output.splitlines():
+        if not started:
+            started = line.strip().startswith("---")
+            continue
+        parts = line.split(None, 2)
+        if len(parts) < 2:
+            continue
+        flags, name = parts[0], parts[1]
+        result[name] = CODEC_TYPES.get(flags[0], "unknown")
+    return result
+
+
+def parse_filters(output: str) -> dict[str, str]:
+    """Parse `ffmpeg -filters` output."""
+    result = {}
+    for line in output.splitlines():
+        parts = line.split(None, 3)
+        if len(parts) >= 3 and "->" in parts[2]:
+            result[parts[1]] = parts[2]
+    return result
+
+
+def parse_formats(output: str) -> dict[str, str]:
+    """Parse `ffmpeg -formats` output."""
+    result: dict[str, str] = {}
+    started = False
+    for line in output.splitlines():
+        if not started:
+            started = line.strip().startswith("--")
+            continue
+        if len(line) < 4:
+            continue
+        flags = line[:3].strip()
+        parts = line[3:].split(None, 1)
+        if not parts:
+            continue
+        for name in parts[0].split(","):
+            result[name] = "".join(sorted(set(result.get(name, "") + flags)))
+    return result
+
+
+def parse_hwaccels(output: str) -> list[str]:
+    """Parse `ffmpeg -hwaccels` output."""
+    lines = [line.strip() for line in output.splitlines()]
+    if lines and lines[0].endswith(":"):
+        lines = lines[1:]
+    return [line for line in lines if line]
+
+
+def _run(path: str, option: str) -> str:
+    proc = subprocess.run(
+        [path, "-hide_banner", option],
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        check=False,
+    )
+    return proc.stdout.decode("utf-8", errors="replace")
+
+
+def _probe(path: str, mtime: float) -> FFmpegCapabilities:
+    logging.debug("Probing capabilities of", path)
+    version_output = _run(path, "-version")
+    match = re_version.match(version_output)
+    return FFmpegCapabilities(
+        path=path,
+        mtime=mtime,
+        version=match.group(1) if match else None,
+        encoders=parse_codecs(_run(path, "-encoders")),
+        decoders=parse_codecs(_run(path, "-decoders")),
+        filters=parse_filters(_run(path, "-filters")),
+        formats=parse_formats(_run(path, "-formats")),
+        hwaccels=parse_hwaccels(_run(path, "-hwaccels")),
+    )
+
+
+def _cache_path(cache_dir: str, path: str) -> str:
+    digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"ffcaps-{digest}.json")
+
+
+def _load_cached(cache_file: str, path: str, mtime: float) -> FFmpegCapabilities | None:
+    try:
+        with open(cache_file) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (
+        data.get("cache_version") != CACHE_VERSION
+        or data.get("path") != path
+        or data.get("mtime") != mtime
+    ):
+        return None
+    return FFmpegCapabilities.from_dict(data)
+
+
+def _save_cached(cache_file: str, capabilities: FFmpegCapabilities) -> None:
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = f"{cache_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(capabilities.to_dict(), f)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        logging.warning("Unable to write ffmpeg capabilities cache", cache_file)
+
+
+def get_capabilities(
+    binary: str = "ffmpeg",
+    cache_dir: str | None = None,
+) -> FFmpegCapabilities:
+    """Return capabilities of an ffmpeg binary.
+
+    The binary is resolved to an absolute path using `resolve_binary`
+    and its capabilities are discovered once per path and modification
+    time. Results are cached in memory and, if `cache_dir` is given,
+    in a JSON file, so other processes can reuse them.
+
+    Args:
+        binary (str):
+            Name or path of the binary (default: "ffmpeg")
+
+        cache_dir (str):
+            Directory for the on-disk cache (default: no disk cache)
+
+    Returns:
+        FFmpegCapabilities
+    """
+    path = resolve_binary(binary)
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        raise FileNotFoundError(f"Could not find {binary}") from None
+
+    key = (path, mtime)
+    with _cache_lock:
+        capabilities = _cache.get(key)
+        if capabilities is not None:
+            return capabilities
+
+        cache_file = _cache_path(cache_dir, path) if cache_dir else None
+        if cache_file:
+            capabilities = _load_cached(cache_file, path, mtime)
+        if capabilities is None:
+            capabilities = _probe(path, mtime)
+            if cache_file:
+                _save_cached(cache_file, capabilities)
+        _cache[key] = capabilities
+        return capabilities
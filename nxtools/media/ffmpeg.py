@@ -4,9 +4,11 @@ import re
 import signal
 import subprocess
 import sys
+import time
 
-from nxtools.common import PLATFORM
-from nxtools.logging import logging
+from nxtools.common import PLATFORM, resolve_binary
+from nxtools.logging import Lazy, logging
+from nxtools.metrics import metrics
 from nxtools.text import indent
 
 FFMPEG_DEBUG = False
@@ -32,7 +34,8 @@ class FFMPEG:
             logging.warning("FFMPEG debug mode is enabled")
 
         self.proc = None
-        self.cmd = ["ffmpeg", "-hide_banner"]
+        self.start_time = 0.0
+        self.cmd = [resolve_binary("ffmpeg"), "-hide_banner"]
         self.cmd.extend(str(arg) for arg in args)
 
     def reset_stderr(self):
@@ -61,7 +64,8 @@ class FFMPEG:
 
     def start(self, stdin=None, stdout=None, stderr=subprocess.PIPE):
         self.reset_stderr()
-        logging.debug("Executing", " ".join(self.cmd))
+        logging.debug("Executing", Lazy(" ".join, self.cmd))
+        self.start_time = time.perf_counter()
         self.proc = subprocess.Popen(
             self.cmd,
             stdin=stdin,
@@ -78,20 +82,27 @@ class FFMPEG:
             self.proc.send_signal(signal.SIGINT)
         return True
 
-    def wait(self, progress_handler=None):
+    def wait(self, progress_handler=None, line_handler=None):
         interrupted = False
         try:
-            while self.process(progress_handler=progress_handler):
+            while self.process(
+                progress_handler=progress_handler,
+                line_handler=line_handler,
+            ):
                 pass
         except KeyboardInterrupt:
             self.stop()
             interrupted = True
         self.proc.wait()
         self.error_log += self.stderr.read().decode("utf-8")
+        if metrics.enabled:
+            duration = time.perf_counter() - self.start_time
+            metrics.observe("nxtools_ffmpeg_run_seconds", duration)
+            metrics.inc("nxtools_ffmpeg_runs_total", exit_code=self.return_code)
         if interrupted:
             raise KeyboardInterrupt
 
-    def process(self, progress_handler=None):
+    def process(self, progress_handler=None, line_handler=None):
         ch = self.proc.stderr.read(1)
         if not ch:
             return False
@@ -111,6 +122,9 @@ class FFMPEG:
             else:
                 self.error_log += line + "\n"
 
+            if line_handler and line:
+                line_handler(line)
+
             if FFMPEG_DEBUG:
                 sys.stderr.write(line + "\n")
 
@@ -169,6 +183,6 @@ def ffmpeg(
 
     if ff.return_code:
         err = indent(ff.error_log)
-        logging.error(f"Problem occured during transcoding\n\n{err}\n\n")
+        logging.error("Problem occured during transcoding", f"\n\n{err}\n\n")
         return False
     return True
@@ -1,16 +1,36 @@
-__all__ = ["ffprobe"]
+__all__ = [
+    "ffprobe",
+    "iter_packets",
+    "iter_frames",
+    "bitrate_per_second",
+    "gop_lengths",
+    "Packet",
+    "Frame",
+    "GOP",
+]
 
 import json
 import os
 import subprocess
-from typing import Any
+import tempfile
+from collections.abc import Iterable, Iterator
+from typing import Any, NamedTuple
 
+from nxtools.common import resolve_binary
 from nxtools.files import FileObject
 from nxtools.logging import logging
+from nxtools.media.mp4 import probe_mp4
+from nxtools.metrics import metrics
 from nxtools.text import indent
 
+MP4_EXTENSIONS = {"mp4", "m4v", "m4a", "mov", "3gp", "3g2"}
 
-def ffprobe(input_file: str, verbose: bool = False) -> dict[str, Any] | None:
+
+def ffprobe(
+    input_file: str,
+    verbose: bool = False,
+    fast: bool = False,
+) -> dict[str, Any] | None:
     """
     Extract metadata from a media file using ffprobe
     and returns a dictionary object with the result
@@ -22,6 +42,12 @@ def ffprobe(input_file: str, verbose: bool = False) -> dict[str, Any] | None:
         verbose (bool):
             Log the ffprobe command. Default is False
 
+        fast (bool):
+            Read MP4/MOV headers in-process (see `probe_mp4`) and spawn
+            ffprobe only for files the built-in parser cannot handle.
+            The result contains basic stream and format information only.
+            Default is False
+
     Returns:
         dict: metadata
     """
@@ -34,21 +60,263 @@ def ffprobe(input_file: str, verbose: bool = False) -> dict[str, Any] | None:
     else:
         raise TypeError("input_path must be of string or FileObject type")
     if not exists:
-        logging.error(f"ffprobe: file '{input_file}' does not exist")
+        logging.error("ffprobe: file does not exist:", input_file)
         return {}
-    cmd = ["ffprobe", "-show_format", "-show_streams", "-print_format", "json", path]
+    if fast and os.path.splitext(path)[1][1:].lower() in MP4_EXTENSIONS:
+        with metrics.timer("nxtools_ffprobe_fast_seconds"):
+            result = probe_mp4(path)
+        metrics.inc(
+            "nxtools_ffprobe_fast_total", result="miss" if result is None else "hit"
+        )
+        if result is not None:
+            return result
+        logging.debug("ffprobe: falling back to ffprobe binary for", path)
+    cmd = [
+        resolve_binary("ffprobe"),
+        "-show_format",
+        "-show_streams",
+        "-print_format",
+        "json",
+        path,
+    ]
     if verbose:
         logging.debug(f"Executing {' '.join(cmd)}")
-    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    assert proc.stdout is not None
-    assert proc.stderr is not None
-    res = proc.stdout.read().decode("utf-8")
-    proc.wait()
+    with metrics.timer("nxtools_ffprobe_spawn_seconds"):
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        assert proc.stdout is not None
+        assert proc.stderr is not None
+        res = proc.stdout.read().decode("utf-8")
+        proc.wait()
+    metrics.inc("nxtools_ffprobe_total", exit_code=proc.returncode)
     if proc.returncode:
         if verbose:
             error_msg = indent(proc.stderr.read())
-            logging.error(f"Unable to read media file {input_file}\n\n{error_msg}\n\n")
+            logging.error(
+                "Unable to read media file", f"{input_file}\n\n{error_msg}\n\n"
+            )
         else:
-            logging.warning(f"Unable to read media file {input_file}")
+            logging.warning("Unable to read media file", input_file)
         return {}
-    return json.loads(res)
+    with metrics.timer("nxtools_ffprobe_parse_seconds"):
+        return json.loads(res)
+
+
+#
+# Streaming packet / frame enumeration
+#
+
+
+class Packet(NamedTuple):
+    stream_index: int
+    pts_time: float | None
+    dts_time: float | None
+    duration_time: float | None
+    size: int
+    pos: int | None
+    keyframe: bool
+
+
+class Frame(NamedTuple):
+    stream_index: int
+    pts_time: float | None
+    duration_time: float | None
+    size: int
+    keyframe: bool
+    pict_type: str
+
+
+class GOP(NamedTuple):
+    start: float
+    frames: int
+    size: int  # bytes
+
+
+PACKET_ENTRIES = "stream_index,pts_time,dts_time,duration_time,size,pos,flags"
+FRAME_ENTRIES = "stream_index,pts_time,duration_time,pkt_size,key_frame,pict_type"
+
+
+def _float(value: str | None) -> float | None:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None  # N/A
+
+
+def _int(value: str | None) -> int | None:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _iter_entries(
+    input_path: str,
+    section: str,
+    entries: str,
+    stream: str | None,
+    read_intervals: str | None,
+) -> Iterator[dict[str, str]]:
+    """Run ffprobe and yield `key=value` records as they are printed."""
+    cmd = [resolve_binary("ffprobe"), "-v", "error"]
+    if stream is not None:
+        cmd.extend(["-select_streams", stream])
+    if read_intervals:
+        cmd.extend(["-read_intervals", read_intervals])
+    cmd.extend(
+        [
+            f"-show_{section}s",
+            "-show_entries",
+            f"{section}={entries}",
+            "-of",
+            "compact=p=0",
+            input_path,
+        ]
+    )
+    # stderr goes to a file so a flood of decoder warnings cannot block ffprobe
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+        assert proc.stdout is not None
+        try:
+            for raw in proc.stdout:
+                line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+                if not line:
+                    continue
+                record = {}
+                for item in line.split("|"):
+                    key, _, value = item.partition("=")
+                    record[key] = value
+                yield record
+            proc.wait()
+        finally:
+            if proc.poll() is None:  # consumer stopped early
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+        if proc.returncode:
+            stderr.seek(0)
+            error_log = indent(stderr.read().decode("utf-8", errors="replace"))
+            logging.error(
+                f"Unable to read {section}s of", f"{input_path}\n\n{error_log}"
+            )
+
+
+def iter_packets(
+    input_path: str,
+    stream: str | None = "v:0",
+    read_intervals: str | None = None,
+) -> Iterator[Packet]:
+    """Yield packets of a media file while ffprobe reads it.
+
+    Packets are read without decoding and parsed one line at a time,
+    so memory use does not depend on the file length.
+
+    Args:
+        input_path (str):
+            Path to the media file
+
+        stream (str):
+            Stream specifier (default: "v:0"). `None` for all streams.
+
+        read_intervals (str):
+            ffprobe `-read_intervals` specification (e.g. "60%+30")
+
+    Yields:
+        Packet: packets in file (decoding) order
+    """
+    for record in _iter_entries(
+        input_path, "packet", PACKET_ENTRIES, stream, read_intervals
+    ):
+        yield Packet(
+            stream_index=_int(record.get("stream_index")) or 0,
+            pts_time=_float(record.get("pts_time")),
+            dts_time=_float(record.get("dts_time")),
+            duration_time=_float(record.get("duration_time")),
+            size=_int(record.get("size")) or 0,
+            pos=_int(record.get("pos")),
+            keyframe="K" in record.get("flags", ""),
+        )
+
+
+def iter_frames(
+    input_path: str,
+    stream: str | None = "v:0",
+    read_intervals: str | None = None,
+) -> Iterator[Frame]:
+    """Yield decoded frames of a media file while ffprobe reads it.
+
+    Unlike `iter_packets`, this decodes the stream, but provides
+    the picture type of each frame. See `iter_packets` for arguments.
+
+    Yields:
+        Frame: frames in presentation order
+    """
+    for record in _iter_entries(
+        input_path, "frame", FRAME_ENTRIES, stream, read_intervals
+    ):
+        yield Frame(
+            stream_index=_int(record.get("stream_index")) or 0,
+            pts_time=_float(record.get("pts_time")),
+            duration_time=_float(record.get("duration_time")),
+            size=_int(record.get("pkt_size")) or 0,
+            keyframe=record.get("key_frame") == "1",
+            pict_type=record.get("pict_type", "?"),
+        )
+
+
+def bitrate_per_second(
+    packets: Iterable[Packet],
+    interval: float = 1.0,
+) -> Iterator[tuple[float, float]]:
+    """Aggregate packet sizes to bitrate.
+
+    Yields `(start time, bits per second)` tuples as soon as each
+    interval is complete. Packets are assigned to intervals by their
+    decoding timestamp, which (unlike pts) never goes back.
+    Pass packets of a single stream to get the bitrate of that stream.
+    Intervals without packets are reported with zero bitrate.
+    """
+    current: int | None = None
+    bits = 0
+    for packet in packets:
+        time = packet.dts_time if packet.dts_time is not None else packet.pts_time
+        if time is None:
+            continue
+        index = int(max(time, 0) // interval)  # dts may start below zero
+        if current is None:
+            current = index
+        while index > current:
+            yield current * interval, bits / interval
+            bits = 0
+            current += 1
+        bits += packet.size * 8
+    if current is not None:
+        yield current * interval, bits / interval
+
+
+def gop_lengths(packets: Iterable[Packet]) -> Iterator[GOP]:
+    """Aggregate packets of a single video stream to GOPs.
+
+    Each GOP is yielded when the next keyframe is reached
+    (the last one at the end of the stream). Packets preceding
+    the first keyframe are ignored.
+    """
+    start: float | None = None
+    frames = 0
+    size = 0
+    for packet in packets:
+        if packet.keyframe:
+            if start is not None:
+                yield GOP(start, frames, size)
+            start = packet.pts_time if packet.pts_time is not None else 0.0
+            frames = 0
+            size = 0
+        if start is None:
+            continue
+        frames += 1
+        size += packet.size
+    if start is not None:
+        yield GOP(start, frames, size)
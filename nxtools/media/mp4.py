@@ -0,0 +1,428 @@
+"""Minimal MP4/QuickTime header parser.
+
+Reads the `moov` box of MP4/MOV files without decoding anything and
+returns basic metadata in the same shape as `ffprobe()`. Only box
+headers and a handful of small leaf boxes are read; media data
+(`mdat`) is skipped by seeking.
+"""
+
+__all__ = ["probe_mp4"]
+
+import datetime
+import os
+import struct
+from fractions import Fraction
+from typing import Any, BinaryIO
+
+from nxtools.timeutils import f2tc
+
+# Descend into these boxes; everything else is a leaf
+CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+# Boxes allowed at the top level of a file we are willing to parse
+TOP_LEVEL = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot", b"uuid"}
+
+# Never read more than this from a single leaf box
+MAX_BOX_READ = 65536
+
+# Number of stts entries inspected to find the frame duration
+MAX_STTS_ENTRIES = 4096
+
+HANDLER_TYPES = {
+    b"vide": "video",
+    b"soun": "audio",
+    b"text": "subtitle",
+    b"sbtl": "subtitle",
+    b"subt": "subtitle",
+    b"clcp": "subtitle",
+    b"tmcd": "data",
+}
+
+# Sample entry fourcc -> ffmpeg codec name.
+# Fourccs not listed here (and ambiguous ones such as `lpcm` or `in24`)
+# make the parser give up so the caller can fall back to ffprobe.
+CODEC_NAMES = {
+    # video
+    b"avc1": "h264",
+    b"avc3": "h264",
+    b"hvc1": "hevc",
+    b"hev1": "hevc",
+    b"dvh1": "hevc",
+    b"dvhe": "hevc",
+    b"av01": "av1",
+    b"vp09": "vp9",
+    b"mp4v": "mpeg4",
+    b"apch": "prores",
+    b"apcn": "prores",
+    b"apcs": "prores",
+    b"apco": "prores",
+    b"ap4h": "prores",
+    b"ap4x": "prores",
+    b"AVdn": "dnxhd",
+    b"AVdh": "dnxhd",
+    b"jpeg": "mjpeg",
+    b"mjpa": "mjpeg",
+    b"png ": "png",
+    b"v210": "v210",
+    b"dvc ": "dvvideo",
+    b"dvcp": "dvvideo",
+    b"dv5n": "dvvideo",
+    b"dv5p": "dvvideo",
+    b"dvh5": "dvvideo",
+    b"dvh6": "dvvideo",
+    b"dvhp": "dvvideo",
+    b"dvhq": "dvvideo",
+    b"mx3n": "mpeg2video",
+    b"mx3p": "mpeg2video",
+    b"mx4n": "mpeg2video",
+    b"mx4p": "mpeg2video",
+    b"mx5n": "mpeg2video",
+    b"mx5p": "mpeg2video",
+    b"m2v1": "mpeg2video",
+    **{f"xdv{c}".encode(): "mpeg2video" for c in "123456789abcdef"},
+    **{f"xd5{c}".encode(): "mpeg2video" for c in "123456789abcdef"},
+    b"xdhd": "mpeg2video",
+    b"xdh2": "mpeg2video",
+    # audio
+    b"ac-3": "ac3",
+    b"ec-3": "eac3",
+    b"sowt": "pcm_s16le",
+    b"twos": "pcm_s16be",
+    b"fLaC": "flac",
+    b"Opus": "opus",
+    b"alac": "alac",
+    b".mp3": "mp3",
+    # subtitles
+    b"tx3g": "mov_text",
+    b"c608": "eia_608",
+    b"wvtt": "webvtt",
+}
+
+# MPEG-4 objectTypeIndication (esds) -> ffmpeg codec name
+OBJECT_TYPES = {
+    0x40: "aac",
+    0x66: "aac",
+    0x67: "aac",
+    0x68: "aac",
+    0x69: "mp3",
+    0x6B: "mp3",
+    0xA5: "ac3",
+    0xA6: "eac3",
+}
+
+MAC_EPOCH = datetime.datetime(1904, 1, 1, tzinfo=datetime.UTC)
+
+
+class UnsupportedFile(Exception):
+    """Raised when the file cannot be fully described by this parser."""
+
+
+def _boxes(f: BinaryIO, start: int, end: int):
+    """Yield (type, payload start, box end) of boxes between start and end."""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            ext = f.read(8)
+            if len(ext) < 8:
+                return
+            size = struct.unpack(">Q", ext)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - pos
+        if size < header_size:
+            raise UnsupportedFile(f"Invalid size of box {box_type!r} at {pos}")
+        yield box_type, pos + header_size, min(pos + size, end)
+        pos += size
+
+
+def _collect(
+    f: BinaryIO,
+    start: int,
+    end: int,
+    prefix: str = "",
+) -> dict[str, tuple[int, int]]:
+    """Return {"mdia/minf/stbl/stsd": (start, end), ...} of leaf boxes."""
+    found: dict[str, tuple[int, int]] = {}
+    for box_type, pos, box_end in _boxes(f, start, end):
+        name = prefix + box_type.decode("latin-1")
+        if box_type in CONTAINERS:
+            for key, value in _collect(f, pos, box_end, name + "/").items():
+                found.setdefault(key, value)
+        else:
+            found.setdefault(name, (pos, box_end))
+    return found
+
+
+def _read(f: BinaryIO, box: tuple[int, int], limit: int = MAX_BOX_READ) -> bytes:
+    start, end = box
+    f.seek(start)
+    return f.read(min(end - start, limit))
+
+
+def _time_header(data: bytes) -> tuple[int, int, int]:
+    """Parse mvhd/mdhd. Return (creation time, timescale, duration)."""
+    if data[0] == 1:
+        creation_time, _, timescale, duration = struct.unpack(">QQIQ", data[4:32])
+    else:
+        creation_time, _, timescale, duration = struct.unpack(">IIII", data[4:20])
+    return creation_time, timescale, duration
+
+
+def _language(data: bytes) -> str:
+    """Decode the packed ISO-639-2 language code of mdhd."""
+    offset = 28 if data[0] == 1 else 20
+    code = struct.unpack(">H", data[offset : offset + 2])[0]
+    if code < 0x400 or code == 0x7FFF:  # Macintosh code or unspecified
+        return "eng" if code == 0 else "und"
+    chars = [((code >> shift) & 0x1F) + 0x60 for shift in (10, 5, 0)]
+    return bytes(chars).decode("ascii", errors="replace")
+
+
+def _esds_codec(entry: bytes) -> str | None:
+    """Return the codec of an `mp4a` sample entry from its esds box."""
+    pos = entry.find(b"esds")
+    if pos == -1:
+        return None
+    data = entry[pos + 8 :]  # skip type, version and flags
+    i = 0
+    while i < len(data):
+        tag = data[i]
+        i += 1
+        size = 0
+        for _ in range(4):
+            if i >= len(data):
+                return None
+            byte = data[i]
+            i += 1
+            size = (size << 7) | (byte & 0x7F)
+            if not byte & 0x80:
+                break
+        if tag == 0x03:  # ES_Descriptor
+            flags = data[i + 2]
+            i += 3
+            if flags & 0x80:
+                i += 2
+            if flags & 0x40:
+                i += 1 + data[i]
+            if flags & 0x20:
+                i += 2
+        elif tag == 0x04:  # DecoderConfigDescriptor
+            return OBJECT_TYPES.get(data[i])
+        else:
+            i += size
+    return None
+
+
+def _format_fraction(value: Fraction) -> str:
+    return f"{value.numerator}/{value.denominator}"
+
+
+def _format_time(timestamp: int) -> str:
+    moment = MAC_EPOCH + datetime.timedelta(seconds=timestamp)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000000Z")
+
+
+def _timecode(f: BinaryIO, boxes: dict[str, tuple[int, int]], entry: bytes) -> str:
+    """Read the start timecode of a tmcd track."""
+    flags, _, _, frames_per_second = struct.unpack(">IIIB", entry[12:25])
+    if flags & 0x01:
+        raise UnsupportedFile("Drop frame timecode")
+    if "mdia/minf/stbl/stco" in boxes:
+        data = _read(f, boxes["mdia/minf/stbl/stco"], 12)
+        offset = struct.unpack(">I", data[8:12])[0]
+    elif "mdia/minf/stbl/co64" in boxes:
+        data = _read(f, boxes["mdia/minf/stbl/co64"], 16)
+        offset = struct.unpack(">Q", data[8:16])[0]
+    else:
+        raise UnsupportedFile("Timecode track without chunk offsets")
+    f.seek(offset)
+    frame_number = struct.unpack(">I", f.read(4))[0]
+    return f2tc(frame_number, base=frames_per_second or 25)
+
+
+def _parse_track(
+    f: BinaryIO,
+    start: int,
+    end: int,
+    index: int,
+) -> dict[str, Any]:
+    boxes = _collect(f, start, end)
+    for required in ("mdia/mdhd", "mdia/hdlr", "mdia/minf/stbl/stsd"):
+        if required not in boxes:
+            raise UnsupportedFile(f"Track {index} has no {required}")
+
+    mdhd = _read(f, boxes["mdia/mdhd"])
+    _, timescale, duration_ts = _time_header(mdhd)
+    if not timescale:
+        raise UnsupportedFile(f"Track {index} has no timescale")
+
+    handler = _read(f, boxes["mdia/hdlr"])[8:12]
+    codec_type = HANDLER_TYPES.get(handler)
+    if codec_type is None:
+        raise UnsupportedFile(f"Unsupported handler {handler!r}")
+
+    stsd = _read(f, boxes["mdia/minf/stbl/stsd"])
+    entry_count = struct.unpack(">I", stsd[4:8])[0]
+    if entry_count != 1:
+        raise UnsupportedFile(f"Track {index} has {entry_count} sample descriptions")
+    entry_size, fourcc = struct.unpack(">I4s", stsd[8:16])
+    entry = stsd[16 : 8 + entry_size]  # sample entry payload
+
+    if fourcc == b"mp4a":
+        codec_name = _esds_codec(entry)
+    else:
+        codec_name = CODEC_NAMES.get(fourcc)
+    if codec_name is None and codec_type != "data":
+        raise UnsupportedFile(f"Unsupported codec {fourcc!r}")
+
+    sample_count = 0
+    if "mdia/minf/stbl/stsz" in boxes:
+        stsz = _read(f, boxes["mdia/minf/stbl/stsz"], 12)
+        sample_count = struct.unpack(">I", stsz[8:12])[0]
+
+    stream: dict[str, Any] = {"index": index}
+    if codec_name:
+        stream["codec_name"] = codec_name
+    stream["codec_type"] = codec_type
+    stream["codec_tag_string"] = fourcc.decode("latin-1")
+    stream["codec_tag"] = f"0x{int.from_bytes(fourcc, 'little'):08x}"
+
+    if codec_type == "video":
+        width, height = struct.unpack(">HH", entry[24:28])
+        stream["width"] = width
+        stream["height"] = height
+        r_frame_rate = Fraction(0)
+        if "mdia/minf/stbl/stts" in boxes:
+            stts = _read(f, boxes["mdia/minf/stbl/stts"], 8 + MAX_STTS_ENTRIES * 8)
+            count = min(struct.unpack(">I", stts[4:8])[0], (len(stts) - 8) // 8)
+            entries = struct.unpack(f">{count * 2}I", stts[8 : 8 + count * 8])
+            deltas: dict[int, int] = {}
+            for i in range(0, len(entries), 2):
+                if entries[i + 1]:
+                    deltas[entries[i + 1]] = deltas.get(entries[i + 1], 0) + entries[i]
+            if deltas:
+                delta = max(deltas, key=lambda d: deltas[d])
+                r_frame_rate = Fraction(timescale, delta)
+        avg_frame_rate = Fraction(0)
+        if duration_ts and sample_count:
+            avg_frame_rate = Fraction(sample_count * timescale, duration_ts)
+        stream["r_frame_rate"] = _format_fraction(r_frame_rate)
+        stream["avg_frame_rate"] = _format_fraction(avg_frame_rate)
+    elif codec_type == "audio":
+        version = struct.unpack(">H", entry[8:10])[0]
+        if version == 2:
+            sample_rate = int(struct.unpack(">d", entry[32:40])[0])
+            channels = struct.unpack(">I", entry[40:44])[0]
+        else:
+            channels = struct.unpack(">H", entry[16:18])[0]
+            sample_rate = struct.unpack(">I", entry[24:28])[0] >> 16
+        stream["sample_rate"] = str(sample_rate or timescale)
+        stream["channels"] = channels
+        stream["r_frame_rate"] = "0/0"
+        stream["avg_frame_rate"] = "0/0"
+    else:
+        stream["r_frame_rate"] = "0/0"
+        stream["avg_frame_rate"] = "0/0"
+
+    stream["time_base"] = f"1/{timescale}"
+    stream["duration_ts"] = duration_ts
+    stream["duration"] = f"{duration_ts / timescale:.6f}"
+    if sample_count:
+        stream["nb_frames"] = str(sample_count)
+
+    tags = {"language": _language(mdhd)}
+    if fourcc == b"tmcd":
+        tags["timecode"] = _timecode(f, boxes, entry)
+    stream["tags"] = tags
+    return stream
+
+
+def _parse(f: BinaryIO, path: str) -> dict[str, Any]:
+    file_size = os.fstat(f.fileno()).st_size
+    moov = None
+    format_tags: dict[str, str] = {}
+    for box_type, pos, box_end in _boxes(f, 0, file_size):
+        if box_type not in TOP_LEVEL:
+            raise UnsupportedFile(f"Unexpected top-level box {box_type!r}")
+        if box_type == b"ftyp":
+            data = _read(f, (pos, box_end), 256)
+            format_tags["major_brand"] = data[0:4].decode("latin-1")
+            format_tags["minor_version"] = str(struct.unpack(">I", data[4:8])[0])
+            format_tags["compatible_brands"] = data[8:].decode("latin-1")
+        elif box_type == b"moov":
+            moov = (pos, box_end)
+            break
+    if moov is None:
+        raise UnsupportedFile("No moov box")
+
+    mvhd = None
+    streams: list[dict[str, Any]] = []
+    for box_type, pos, box_end in _boxes(f, *moov):
+        if box_type == b"mvhd":
+            mvhd = _read(f, (pos, box_end), 32)
+        elif box_type == b"mvex":
+            raise UnsupportedFile("Fragmented file")
+        elif box_type == b"trak":
+            streams.append(_parse_track(f, pos, box_end, len(streams)))
+    if mvhd is None or not streams:
+        raise UnsupportedFile("No movie header or tracks")
+
+    creation_time, timescale, duration_ts = _time_header(mvhd)
+    duration = duration_ts / timescale if timescale else 0
+    if not duration:
+        duration = max(float(stream["duration"]) for stream in streams)
+
+    # the movie timecode is reported on the video stream as well
+    timecode = next(
+        (s["tags"]["timecode"] for s in streams if "timecode" in s["tags"]), None
+    )
+    for stream in streams:
+        if timecode and stream["codec_type"] == "video":
+            stream["tags"]["timecode"] = timecode
+    if creation_time:
+        format_tags["creation_time"] = _format_time(creation_time)
+
+    result: dict[str, Any] = {
+        "streams": streams,
+        "format": {
+            "filename": path,
+            "nb_streams": len(streams),
+            "format_name": "mov,mp4,m4a,3gp,3g2,mj2",
+            "format_long_name": "QuickTime / MOV",
+            "duration": f"{duration:.6f}",
+            "size": str(file_size),
+            "probe_score": 100,
+            "tags": format_tags,
+        },
+    }
+    if duration:
+        result["format"]["bit_rate"] = str(int(file_size * 8 / duration))
+    return result
+
+
+def probe_mp4(path: str) -> dict[str, Any] | None:
+    """Return metadata of an MP4/MOV file without spawning ffprobe.
+
+    The result has the same structure as `ffprobe()` output, limited to
+    container duration, size and bitrate, and for each stream its codec,
+    FourCC, time base, duration, frame count, dimensions and frame rate
+    (video), sample rate and channels (audio) and language and timecode
+    tags.
+
+    Returns:
+        dict: metadata or `None` if the file is not an MP4/MOV file or
+        uses features the parser does not handle (fragmented files,
+        unknown codecs, multiple sample descriptions, drop frame
+        timecode...). Use `ffprobe()` in that case.
+    """
+    try:
+        with open(path, "rb") as f:
+            return _parse(f, path)
+    except (UnsupportedFile, struct.error, IndexError, OverflowError, ValueError):
+        return None
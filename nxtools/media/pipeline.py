@@ -0,0 +1,296 @@
+__all__ = ["Command", "Pipeline", "StageError"]
+
+import errno
+import os
+import signal
+import subprocess
+import threading
+from collections import deque
+from collections.abc import Callable, Sequence
+from typing import NamedTuple
+
+from nxtools.common import PLATFORM, resolve_binary
+from nxtools.logging import Lazy, logging
+from nxtools.media.ffmpeg import FFMPEG
+from nxtools.text import indent
+
+# Number of stderr lines of a Command kept in its error log
+COMMAND_LOG_LINES = 100
+
+
+class Command:
+    """An arbitrary process used as a pipeline stage.
+
+    Provides the same interface as `FFMPEG` (start, stop, wait,
+    return_code and error_log), but does not parse progress.
+    Only the last lines of its stderr output are kept.
+    """
+
+    def __init__(self, *args) -> None:
+        self.proc: subprocess.Popen | None = None
+        self.cmd = [str(arg) for arg in args]
+        self.error_log = ""
+
+    def __repr__(self):
+        return f"<Command {os.path.basename(self.cmd[0])}>"
+
+    @property
+    def is_running(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    @property
+    def return_code(self) -> int | None:
+        return self.proc.returncode if self.proc else None
+
+    def start(self, stdin=None, stdout=None, stderr=subprocess.PIPE, pass_fds=()):
+        self.error_log = ""
+        logging.debug("Executing", Lazy(" ".join, self.cmd))
+        self.proc = subprocess.Popen(
+            self.cmd,
+            stdin=stdin,
+            stdout=stdout,
+            stderr=stderr,
+            pass_fds=pass_fds,
+        )
+
+    def stop(self) -> bool:
+        if not self.proc:
+            return False
+        if self.proc.poll() is None:
+            self.proc.terminate()
+        return True
+
+    def wait(self, progress_handler=None) -> None:
+        assert self.proc is not None
+        if self.proc.stderr is not None:
+            lines: deque[str] = deque(maxlen=COMMAND_LOG_LINES)
+            for line in self.proc.stderr:
+                lines.append(line.decode("utf-8", errors="replace").rstrip())
+            self.proc.stderr.close()
+            self.error_log = "".join(line + "\n" for line in lines)
+        self.proc.wait()
+
+
+Stage = FFMPEG | Command
+
+
+class StageError(NamedTuple):
+    stage_index: int
+    stage: Stage
+    return_code: int | None
+    error_log: str
+
+
+def _stage_name(stage: Stage) -> str:
+    return os.path.basename(stage.cmd[0])
+
+
+def _is_broken_pipe(error: StageError) -> bool:
+    """Return `True` if a stage failed because a later stage stopped reading."""
+    sigpipe = getattr(signal, "SIGPIPE", 13)
+    # killed by the signal, or a shell reporting that its child was
+    if error.return_code in (-sigpipe, 128 + sigpipe):
+        return True
+    if not isinstance(error.stage, FFMPEG):
+        return False
+    # ffmpeg ignores SIGPIPE and fails writing to the closed pipe instead.
+    # Recent versions exit with AVERROR(EPIPE) as the return code.
+    epipe = 256 - errno.EPIPE
+    return error.return_code == epipe or "Broken pipe" in error.error_log
+
+
+class Pipeline:
+    """Processes connected with OS pipes.
+
+    Output of each stage is connected directly to the input of the next
+    one, so the data never passes through Python. The last argument may
+    be a list of stages: the output is then duplicated to all of them
+    using the `tee` utility (not available on Windows).
+
+    ```python
+    pipeline = Pipeline(
+        FFMPEG("-i", "input.mxf", "-c:v", "libx264", "-f", "mpegts", "-"),
+        [
+            FFMPEG("-i", "-", "-c", "copy", "output.mp4"),
+            Command("packager", "--input", "/dev/stdin"),
+        ],
+    )
+    if not pipeline.run():
+        for error in pipeline.errors:
+            ...
+    ```
+
+    Args:
+        *stages (FFMPEG | Command | list):
+            Pipeline stages
+
+        progress_handler (function):
+            Called with the position (seconds) of the slowest FFMPEG
+            stage which reports progress
+    """
+
+    def __init__(
+        self,
+        *stages: Stage | Sequence[Stage],
+        progress_handler: Callable[[float], None] | None = None,
+    ):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.chain: list[Stage] = []
+        self.consumers: list[Stage] = []
+        for i, stage in enumerate(stages):
+            if isinstance(stage, FFMPEG | Command):
+                self.chain.append(stage)
+            elif i == len(stages) - 1 and stage:
+                self.consumers = list(stage)
+            else:
+                raise ValueError("Only the last pipeline stage can be a list")
+        if len(self.consumers) == 1:
+            self.chain.extend(self.consumers)
+            self.consumers = []
+        if self.consumers and PLATFORM == "windows":
+            raise NotImplementedError("Pipeline tee is not supported on Windows")
+
+        self.progress_handler = progress_handler
+        self.tee: Command | None = None
+        self.positions: dict[int, float] = {}
+        self.lock = threading.Lock()
+        self.threads: list[threading.Thread] = []
+
+    @property
+    def stages(self) -> list[Stage]:
+        """All processes of the pipeline (including `tee`)."""
+        result = list(self.chain)
+        if self.tee is not None:
+            result.append(self.tee)
+        return result + self.consumers
+
+    @property
+    def is_running(self) -> bool:
+        return any(stage.is_running for stage in self.stages)
+
+    def start(self, stdin=subprocess.DEVNULL, stdout=None) -> None:
+        """Start all stages.
+
+        Args:
+            stdin:
+                Input of the first stage (default: none)
+
+            stdout:
+                Output of the last stage(s) (default: inherited)
+        """
+        opened: list[int] = []
+
+        def make_pipe() -> tuple[int, int]:
+            read_fd, write_fd = os.pipe()
+            opened.extend([read_fd, write_fd])
+            return read_fd, write_fd
+
+        def close(fd) -> None:
+            # parent copies must be closed, otherwise readers never get EOF
+            if fd in opened:
+                opened.remove(fd)
+                os.close(fd)
+
+        try:
+            source = stdin
+            for i, stage in enumerate(self.chain):
+                last = i == len(self.chain) - 1 and not self.consumers
+                read_fd, write_fd = (None, stdout) if last else make_pipe()
+                stage.start(stdin=source, stdout=write_fd)
+                close(source)
+                close(write_fd)
+                source = read_fd
+
+            if self.consumers:
+                pipes = [make_pipe() for _ in self.consumers]
+                extra_fds = [write_fd for _, write_fd in pipes[1:]]
+                self.tee = Command(
+                    resolve_binary("tee"), *[f"/dev/fd/{fd}" for fd in extra_fds]
+                )
+                self.tee.start(stdin=source, stdout=pipes[0][1], pass_fds=extra_fds)
+                close(source)
+                for _, write_fd in pipes:
+                    close(write_fd)
+                for consumer, (read_fd, _) in zip(self.consumers, pipes, strict=True):
+                    consumer.start(stdin=read_fd, stdout=stdout)
+                    close(read_fd)
+        except BaseException:
+            for fd in opened:
+                os.close(fd)
+            self.stop()
+            raise
+
+    def stop(self) -> None:
+        """Stop all running stages."""
+        for stage in self.stages:
+            if stage.proc is not None and stage.proc.poll() is None:
+                stage.stop()
+
+    def _progress(self, index: int, position: float) -> None:
+        with self.lock:
+            self.positions[index] = position
+            slowest = min(self.positions.values())
+        if self.progress_handler is not None:
+            self.progress_handler(slowest)
+
+    def _wait_stage(self, index: int, stage: Stage) -> None:
+        if isinstance(stage, FFMPEG):
+
+            def progress_handler(position: float) -> None:
+                self._progress(index, position)
+
+            stage.wait(progress_handler=progress_handler)
+        else:
+            stage.wait()
+
+    def wait(self) -> bool:
+        """Wait until all stages finish. Return `True` on success.
+
+        Errors of failed stages are logged and available
+        in the `errors` property.
+        """
+        self.threads = [
+            threading.Thread(target=self._wait_stage, args=(i, stage), daemon=True)
+            for i, stage in enumerate(self.stages)
+            if stage.proc is not None
+        ]
+        for thread in self.threads:
+            thread.start()
+        try:
+            for thread in self.threads:
+                while thread.is_alive():
+                    thread.join(0.1)
+        except KeyboardInterrupt:
+            self.stop()
+            for thread in self.threads:
+                thread.join()
+            raise
+
+        errors = self.errors
+        for error in errors:
+            logging.error(
+                "Pipeline stage failed:",
+                f"{error.stage_index} ({_stage_name(error.stage)})",
+                f"with code {error.return_code}\n\n{indent(error.error_log)}",
+            )
+        return not errors
+
+    def run(self, stdin=subprocess.DEVNULL, stdout=None) -> bool:
+        """Start the pipeline and wait until it finishes."""
+        self.start(stdin=stdin, stdout=stdout)
+        return self.wait()
+
+    @property
+    def errors(self) -> list[StageError]:
+        """Failed stages.
+
+        Stages which failed on a broken pipe (because a later stage
+        failed first) are listed last.
+        """
+        result = [
+            StageError(i, stage, stage.return_code, stage.error_log)
+            for i, stage in enumerate(self.stages)
+            if stage.proc is not None and stage.return_code
+        ]
+        return sorted(result, key=_is_broken_pipe)
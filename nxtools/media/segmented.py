@@ -0,0 +1,395 @@
+__all__ = ["Segment", "SegmentedTranscoder", "segmented_transcode", "probe_keyframes"]
+
+import bisect
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from nxtools.logging import logging
+from nxtools.media.ffmpeg import FFMPEG
+from nxtools.media.ffprobe import ffprobe, iter_packets
+from nxtools.text import indent
+
+
+def probe_keyframes(input_path: str) -> tuple[list[float], list[float]]:
+    """Return keyframe times and all frame times of the first video stream.
+
+    Only packets are read (nothing is decoded), so the probe takes
+    roughly as long as reading the file.
+
+    Returns:
+        tuple[list[float], list[float]]: sorted keyframe and frame times
+    """
+    keyframes = []
+    frames = []
+    for packet in iter_packets(input_path, stream="v:0"):
+        if packet.pts_time is None:
+            continue
+        frames.append(packet.pts_time)
+        if packet.keyframe:
+            keyframes.append(packet.pts_time)
+    keyframes.sort()
+    frames.sort()
+    return keyframes, frames
+
+
+class Segment:
+    """A GOP-aligned part of the input encoded by a single ffmpeg process."""
+
+    def __init__(self, index: int, start: float, end: float, frames: int, path: str):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.frames = frames
+        self.path = path
+        self.position = 0.0
+        self.attempts = 0
+        self.ff: FFMPEG | None = None
+
+    def __repr__(self):
+        return f"<Segment {self.index} {self.start:.3f}-{self.end:.3f}>"
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class SegmentedTranscoder:
+    """Transcode a long file by encoding GOP-aligned segments in parallel.
+
+    The video stream is cut at keyframes into segments of at least
+    `segment_duration` seconds, which are encoded by concurrent ffmpeg
+    processes. Audio is encoded once for the whole file (in parallel
+    with the video segments), so there are no gaps or priming samples
+    at segment boundaries. Finally, the segments and the audio are
+    joined using the concat demuxer without re-encoding.
+
+    Args:
+        input_path (str):
+            Source file
+
+        output_path (str):
+            Target file. Segments use the same container.
+
+        video_args (list[str]):
+            ffmpeg video encoding arguments (e.g. `["-c:v", "libx264"]`)
+
+        audio_args (list[str]):
+            ffmpeg audio encoding arguments (default: copy).
+            Use `None` together with `audio=False` to drop audio.
+
+        audio (bool):
+            Include audio tracks (default: True)
+
+        segment_duration (float):
+            Minimum segment duration in seconds (default: 60)
+
+        workers (int):
+            Number of concurrent ffmpeg processes (default: number of CPUs)
+
+        retries (int):
+            Number of attempts to re-encode a failed segment (default: 2)
+
+        temp_dir (str):
+            Directory for intermediate files
+            (default: the directory of the output file)
+
+        progress_handler (function):
+            Called with the number of seconds of video encoded so far
+            (all segments combined)
+    """
+
+    def __init__(
+        self,
+        input_path: str,
+        output_path: str,
+        video_args: list[str],
+        audio_args: list[str] | None = None,
+        audio: bool = True,
+        segment_duration: float = 60,
+        workers: int | None = None,
+        retries: int = 2,
+        temp_dir: str | None = None,
+        progress_handler: Callable[[float], None] | None = None,
+    ):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.video_args = [str(arg) for arg in video_args]
+        self.audio_args = [str(arg) for arg in audio_args or ["-c:a", "copy"]]
+        self.audio = audio
+        self.segment_duration = segment_duration
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.retries = retries
+        self.temp_dir = temp_dir
+        self.progress_handler = progress_handler
+
+        self.ext = os.path.splitext(output_path)[1] or ".mkv"
+        self.segments: list[Segment] = []
+        self.duration = 0.0
+        self.has_audio = False
+        self.work_dir = ""
+        self.lock = threading.Lock()
+        self.running: list[FFMPEG] = []
+        self.stopping = False
+
+    def plan(self, keyframes: list[float], frames: list[float]) -> list[Segment]:
+        """Split the video into segments starting at keyframes."""
+        if not frames:
+            return []
+        cuts = [frames[0]]
+        for keyframe in keyframes:
+            if keyframe - cuts[-1] >= self.segment_duration:
+                cuts.append(keyframe)
+        # avoid a very short last segment
+        if len(cuts) > 1 and frames[-1] - cuts[-1] < self.segment_duration / 2:
+            cuts.pop()
+
+        segments = []
+        for i, start in enumerate(cuts):
+            last = i == len(cuts) - 1
+            end = self.duration if last else cuts[i + 1]
+            first_frame = bisect.bisect_left(frames, start)
+            last_frame = len(frames) if last else bisect.bisect_left(frames, end)
+            path = os.path.join(self.work_dir, f"segment_{i:05d}{self.ext}")
+            segments.append(
+                Segment(i, start, max(end, start), last_frame - first_frame, path)
+            )
+        return segments
+
+    def _seek_margin(self, frames: list[float]) -> float:
+        """Half of the shortest frame interval.
+
+        Seeking slightly before the keyframe guarantees that rounding
+        of the seek position never drops the first frame of a segment.
+        """
+        gaps = [b - a for a, b in zip(frames[:1000], frames[1:1001]) if b > a]
+        return min(gaps) / 2 if gaps else 0.001
+
+    def _update_progress(self) -> None:
+        if self.progress_handler is None:
+            return
+        with self.lock:
+            position = sum(min(s.position, s.duration) for s in self.segments)
+        self.progress_handler(position)
+
+    def _run_ffmpeg(
+        self,
+        args: list[str],
+        progress_handler: Callable[[float], None] | None = None,
+    ) -> FFMPEG:
+        ff = FFMPEG(*args)
+        with self.lock:
+            if self.stopping:
+                raise InterruptedError
+            self.running.append(ff)
+        try:
+            ff.start(stdin=subprocess.DEVNULL)
+            ff.wait(progress_handler=progress_handler)
+        finally:
+            with self.lock:
+                self.running.remove(ff)
+        return ff
+
+    def encode_segment(self, segment: Segment, margin: float) -> bool:
+        def progress_handler(position: float) -> None:
+            segment.position = position
+            self._update_progress()
+
+        args = [
+            "-y",
+            "-ss",
+            f"{max(0, segment.start - margin):.6f}",
+            "-i",
+            self.input_path,
+            "-map",
+            "0:v:0",
+            "-frames:v",
+            str(segment.frames),
+            "-an",
+            "-sn",
+            "-dn",
+            *self.video_args,
+            segment.path,
+        ]
+        while True:
+            segment.attempts += 1
+            segment.position = 0
+            try:
+                ff = self._run_ffmpeg(args, progress_handler)
+            except InterruptedError:
+                return False
+            if ff.return_code == 0:
+                segment.position = segment.duration
+                self._update_progress()
+                return True
+            if self.stopping:
+                return False
+            if segment.attempts > self.retries:
+                logging.error(
+                    "Unable to encode segment",
+                    f"{segment.index} of {self.input_path}\n\n{indent(ff.error_log)}",
+                )
+                return False
+            logging.warning(
+                "Encoding failed, retrying segment",
+                segment.index,
+                "of",
+                self.input_path,
+            )
+
+    def encode_audio(self) -> bool:
+        args = [
+            "-y",
+            "-i",
+            self.input_path,
+            "-map",
+            "0:a",
+            "-vn",
+            "-sn",
+            "-dn",
+            *self.audio_args,
+            self.audio_path,
+        ]
+        for attempt in range(self.retries + 1):
+            try:
+                ff = self._run_ffmpeg(args)
+            except InterruptedError:
+                return False
+            if ff.return_code == 0:
+                return True
+            if self.stopping:
+                return False
+            if attempt == self.retries:
+                logging.error(
+                    "Unable to encode audio of",
+                    f"{self.input_path}\n\n{indent(ff.error_log)}",
+                )
+        return False
+
+    @property
+    def audio_path(self) -> str:
+        return os.path.join(self.work_dir, "audio.mka")
+
+    def concat(self) -> bool:
+        list_path = os.path.join(self.work_dir, "segments.txt")
+        with open(list_path, "w") as f:
+            for segment in self.segments:
+                escaped = segment.path.replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        args = ["-y", "-f", "concat", "-safe", "0", "-i", list_path]
+        if self.has_audio:
+            args.extend(["-i", self.audio_path, "-map", "0:v", "-map", "1:a"])
+        else:
+            args.extend(["-map", "0:v"])
+        args.extend(["-c", "copy", self.output_path])
+
+        ff = self._run_ffmpeg(args)
+        if ff.return_code:
+            logging.error(
+                "Unable to join segments of",
+                f"{self.input_path}\n\n{indent(ff.error_log)}",
+            )
+            return False
+        return True
+
+    def stop(self) -> None:
+        """Stop all running ffmpeg processes."""
+        with self.lock:
+            self.stopping = True
+            for ff in self.running:
+                ff.stop()
+
+    def run(self) -> bool:
+        """Transcode the file. Return `True` on success."""
+        meta = ffprobe(self.input_path)
+        if not meta:
+            return False
+        try:
+            self.duration = float(meta.get("format", {}).get("duration", 0))
+        except ValueError:
+            self.duration = 0
+        try:
+            start_time = float(meta.get("format", {}).get("start_time", 0))
+        except ValueError:
+            start_time = 0
+        self.has_audio = self.audio and any(
+            stream.get("codec_type") == "audio" for stream in meta.get("streams", [])
+        )
+
+        # packet times are absolute, but input seeking (-ss) counts
+        # from the start time of the file (e.g. ~1.4s in MPEG-TS)
+        keyframes, frames = probe_keyframes(self.input_path)
+        if start_time:
+            keyframes = [t - start_time for t in keyframes]
+            frames = [t - start_time for t in frames]
+        if not frames:
+            logging.error("No video frames found in", self.input_path)
+            return False
+        self.duration = max(self.duration, frames[-1])
+
+        output_dir = os.path.dirname(os.path.abspath(self.output_path))
+        self.work_dir = tempfile.mkdtemp(
+            prefix=".nxtools-segments-",
+            dir=self.temp_dir or output_dir,
+        )
+        try:
+            self.segments = self.plan(keyframes, frames)
+            margin = self._seek_margin(frames)
+            logging.info(
+                "Encoding",
+                self.input_path,
+                f"in {len(self.segments)} segments using {self.workers} workers",
+            )
+
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+            try:
+                futures = []
+                if self.has_audio:
+                    futures.append(executor.submit(self.encode_audio))
+                for segment in self.segments:
+                    futures.append(
+                        executor.submit(self.encode_segment, segment, margin)
+                    )
+                for future in futures:
+                    if not future.result():
+                        self.stop()
+            except KeyboardInterrupt:
+                self.stop()
+                raise
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+            if self.stopping:
+                return False
+            return self.concat()
+        finally:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def segmented_transcode(
+    input_path: str,
+    output_path: str,
+    video_args: list[str],
+    audio_args: list[str] | None = None,
+    **kwargs,
+) -> bool:
+    """Transcode a file by encoding its segments in parallel.
+
+    See `SegmentedTranscoder` for the description of arguments.
+
+    Returns:
+        bool: indicate if the process was successful
+    """
+    transcoder = SegmentedTranscoder(
+        input_path,
+        output_path,
+        video_args,
+        audio_args=audio_args,
+        **kwargs,
+    )
+    return transcoder.run()
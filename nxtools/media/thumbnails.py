@@ -0,0 +1,311 @@
+__all__ = ["Thumbnail", "extract_thumbnails"]
+
+import os
+import re
+import subprocess
+import threading
+from typing import Literal, NamedTuple
+
+from nxtools.logging import logging
+from nxtools.media.capabilities import get_capabilities
+from nxtools.media.ffmpeg import FFMPEG
+from nxtools.media.ffprobe import ffprobe
+from nxtools.text import indent
+
+# Assets longer than this (seconds) are seeked instead of decoded
+FAST_SEEK_THRESHOLD = 600
+
+re_showinfo = re.compile(r"\[Parsed_showinfo_\d+ @ [^\]]+\] n:\s*\d+ .*pts_time:(\S+)")
+
+
+class Thumbnail(NamedTuple):
+    """An extracted image.
+
+    `data` contains the encoded image when images are returned
+    in memory, `path` is set when they are written to a directory.
+    """
+
+    time: float
+    data: bytes | None = None
+    path: str | None = None
+
+
+#
+# Splitting piped image streams
+#
+
+
+def split_jpeg(data: bytes) -> list[bytes]:
+    """Split concatenated JPEG images (e.g. `image2pipe` mjpeg output)."""
+    images: list[bytes] = []
+    pos = 0
+    size = len(data)
+    while pos + 4 <= size:
+        if data[pos : pos + 2] != b"\xff\xd8":
+            raise ValueError(f"Invalid JPEG stream at offset {pos}")
+        start = pos
+        pos += 2
+        # header segments (length-prefixed) up to start of scan
+        while pos + 4 <= size:
+            marker = data[pos + 1]
+            length = int.from_bytes(data[pos + 2 : pos + 4], "big")
+            pos += 2 + length
+            if marker == 0xDA:
+                break
+        # entropy-coded data: 0xFF is followed by 0x00 (stuffing),
+        # RSTn (0xD0-0xD7) or a marker. EOI (0xD9) ends the image.
+        while True:
+            pos = data.find(b"\xff", pos)
+            if pos == -1 or pos + 1 >= size:
+                return images
+            marker = data[pos + 1]
+            if marker == 0xD9:
+                pos += 2
+                images.append(data[start:pos])
+                break
+            if marker == 0xDA:  # progressive JPEG: next scan header
+                length = int.from_bytes(data[pos + 2 : pos + 4], "big")
+                pos += 2 + length
+            else:
+                pos += 2
+    return images
+
+
+def split_png(data: bytes) -> list[bytes]:
+    """Split concatenated PNG images (e.g. `image2pipe` png output)."""
+    images: list[bytes] = []
+    pos = 0
+    size = len(data)
+    while pos + 8 <= size:
+        if data[pos : pos + 8] != b"\x89PNG\r\n\x1a\n":
+            raise ValueError(f"Invalid PNG stream at offset {pos}")
+        start = pos
+        pos += 8
+        while pos + 8 <= size:
+            length = int.from_bytes(data[pos : pos + 4], "big")
+            chunk_type = data[pos + 4 : pos + 8]
+            pos += 12 + length  # length, type, data, crc
+            if chunk_type == b"IEND":
+                images.append(data[start:pos])
+                break
+    return images
+
+
+def _passthrough_args() -> list[str]:
+    """Return arguments disabling frame duplication/dropping."""
+    try:
+        version = get_capabilities().version_tuple
+    except FileNotFoundError:
+        version = ()
+    if version and version < (5, 1):
+        return ["-vsync", "passthrough"]
+    return ["-fps_mode", "passthrough"]
+
+
+def _select_expression(timestamps: list[float]) -> str:
+    """Select the first frame at or after each timestamp.
+
+    Unless `-copyts` is used, ffmpeg shifts input timestamps by the start
+    time of the file, so `pts*TB` counts from the start the same way
+    as input seeking (`-ss`) does.
+    """
+    terms = [
+        f"(isnan(prev_pts)+lt(prev_pts*TB,{t:.6f}))*gte(pts*TB,{t:.6f})"
+        for t in timestamps
+    ]
+    return "+".join(terms)
+
+
+def extract_thumbnails(
+    input_path: str,
+    timestamps: list[float] | None = None,
+    keyframes: bool = False,
+    scene: float | None = None,
+    width: int | None = None,
+    height: int | None = None,
+    format: Literal["jpg", "png"] = "jpg",
+    quality: int = 3,
+    output_dir: str | None = None,
+    name: str = "thumb",
+    max_frames: int | None = None,
+    fast_seek: bool | None = None,
+    duration: float | None = None,
+) -> list[Thumbnail]:
+    """Extract multiple images from a video file using one ffmpeg process.
+
+    Exactly one of the modes must be used:
+     - `timestamps`: first frame at (or after) each of the given times
+     - `keyframes`: all keyframes (only keyframes are decoded)
+     - `scene`: frames with a scene change score above the threshold (0-1)
+
+    For timestamps in long assets (over `FAST_SEEK_THRESHOLD` seconds)
+    input seeking is used: the file is opened once per timestamp
+    within the same process, and only the frames around each timestamp
+    are decoded. Shorter assets are decoded once up to the last timestamp.
+
+    Args:
+        input_path (str):
+            Path to the video file
+
+        timestamps (list[float]):
+            Times (in seconds) of requested images
+
+        keyframes (bool):
+            Extract keyframes
+
+        scene (float):
+            Scene change detection threshold (e.g. 0.4)
+
+        width (int), height (int):
+            Output size. If only one is set, aspect ratio is preserved.
+
+        format (str):
+            "jpg" or "png" (default: "jpg")
+
+        quality (int):
+            JPEG quality (2-31, lower is better, default: 3)
+
+        output_dir (str):
+            Write images to this directory instead of returning them
+            in memory. Files are named `{name}_0001.{format}`...
+
+        max_frames (int):
+            Maximum number of images
+
+        fast_seek (bool):
+            Force (or disable) input seeking in timestamps mode.
+            By default it is chosen automatically by the asset duration.
+
+        duration (float):
+            Duration of the asset, if known (saves an ffprobe call)
+
+    Returns:
+        list[Thumbnail]: images ordered by time. An empty list on failure.
+    """
+    modes = sum([bool(timestamps), keyframes, scene is not None])
+    if modes != 1:
+        raise ValueError("Specify exactly one of timestamps, keyframes or scene")
+    if format not in ("jpg", "png"):
+        raise ValueError(f"Unsupported format: {format}")
+
+    times = sorted(set(timestamps)) if timestamps else []
+    if max_frames and times:
+        times = times[:max_frames]
+
+    if times and fast_seek is None:
+        if duration is None:
+            meta = ffprobe(input_path) or {}
+            try:
+                duration = float(meta.get("format", {}).get("duration", 0))
+            except ValueError:
+                duration = 0
+        fast_seek = duration > FAST_SEEK_THRESHOLD
+
+    filters = []
+    args: list[str] = []
+    if times and fast_seek:
+        for t in times:
+            args.extend(["-ss", f"{t:.6f}", "-i", input_path])
+        graph = "".join(
+            f"[{i}:v:0]trim=end_frame=1,setpts=PTS-STARTPTS[v{i}];"
+            for i in range(len(times))
+        )
+        graph += "".join(f"[v{i}]" for i in range(len(times)))
+        # single-frame segments have no duration: renumber timestamps
+        graph += f"concat=n={len(times)}:v=1:a=0,settb=1,setpts=N"
+    else:
+        if keyframes:
+            args.extend(["-skip_frame", "nokey"])
+        if times:
+            # no need to decode past the last requested frame
+            args.extend(["-t", f"{times[-1] + 1:.6f}"])
+            filters.append(f"select='{_select_expression(times)}'")
+        elif scene is not None:
+            filters.append(f"select='gt(scene,{scene})'")
+        filters.append("showinfo")
+        args.extend(["-i", input_path])
+        graph = ""
+
+    if width or height:
+        filters.append(f"scale={width or -2}:{height or -2}")
+
+    if graph:
+        graph = ",".join([graph, *filters]) + "[out]"
+        args.extend(["-filter_complex", graph, "-map", "[out]"])
+    else:
+        args.extend(["-map", "0:v:0", "-vf", ",".join(filters)])
+
+    args.extend(["-an", "-sn", "-dn", *_passthrough_args()])
+    if max_frames:
+        args.extend(["-frames:v", str(max_frames)])
+    if format == "jpg":
+        args.extend(["-c:v", "mjpeg", "-q:v", str(quality)])
+    else:
+        args.extend(["-c:v", "png"])
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        pattern = os.path.join(output_dir, f"{name}_%04d.{format}")
+        args.extend(["-f", "image2", "-y", pattern])
+    else:
+        args.extend(["-f", "image2pipe", "-"])
+
+    frame_times: list[float] = []
+
+    def line_handler(line: str) -> None:
+        match = re_showinfo.search(line)
+        if match:
+            frame_times.append(float(match.group(1)))
+
+    ff = FFMPEG(*args)
+    ff.start(
+        stdin=subprocess.DEVNULL,
+        stdout=None if output_dir else subprocess.PIPE,
+    )
+
+    chunks: list[bytes] = []
+    reader = None
+    if not output_dir:
+        reader = threading.Thread(target=lambda: chunks.append(ff.stdout.read()))
+        reader.start()
+    ff.wait(line_handler=line_handler)
+    if reader is not None:
+        reader.join()
+
+    if ff.return_code:
+        logging.error(
+            "Unable to extract thumbnails from",
+            f"{input_path}\n\n{indent(ff.error_log)}",
+        )
+        return []
+
+    if times and fast_seek:
+        result_times = times
+    elif times:
+        # map decoded frames back to requested times
+        result_times = []
+        for frame_time in frame_times:
+            requested = [t for t in times if t <= frame_time + 0.001]
+            result_times.append(requested[-1] if requested else frame_time)
+    else:
+        result_times = frame_times
+
+    images: list[bytes | None]
+    paths: list[str | None]
+    if output_dir:
+        count = len(result_times)
+        images = [None] * count
+        paths = [
+            os.path.join(output_dir, f"{name}_{i + 1:04d}.{format}")
+            for i in range(count)
+        ]
+    else:
+        data = b"".join(chunks)
+        images = list(split_jpeg(data) if format == "jpg" else split_png(data))
+        count = len(images)
+        paths = [None] * count
+
+    return [
+        Thumbnail(time=t, data=data, path=path)
+        for t, data, path in zip(result_times, images, paths, strict=False)
+    ]
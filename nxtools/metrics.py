@@ -0,0 +1,222 @@
+"""Lightweight instrumentation: counters, histograms and timers."""
+
+__all__ = ["Metrics", "Timer", "metrics"]
+
+import functools
+import threading
+import time
+from typing import Any
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+)
+
+LabelSet = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, Any]) -> LabelSet:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: LabelSet, extra: LabelSet = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Histogram:
+    """Distribution of observed values in fixed buckets."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Timer:
+    """Measure the duration of a block of code or a function call.
+
+    Can be used as a context manager or as a decorator.
+    The duration (in seconds) is recorded to a histogram,
+    but only when metrics are enabled.
+
+    Example:
+        with metrics.timer("transcode_seconds", preset="slow"):
+            ...
+
+        @metrics.timer("handler_seconds")
+        def handler():
+            ...
+    """
+
+    def __init__(self, registry: "Metrics", name: str, labels: dict[str, Any]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.start: float | None = None
+        self.elapsed: float | None = None
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter() if self.registry.enabled else None
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.start is None:
+            return
+        self.elapsed = time.perf_counter() - self.start
+        self.registry.observe(self.name, self.elapsed, **self.labels)
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Timer(self.registry, self.name, self.labels):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+class Metrics:
+    """Registry of counters and histograms.
+
+    Metrics are disabled by default. While disabled, all recording
+    methods return immediately, so instrumented code paths
+    pay only an attribute lookup.
+
+    Counters and histograms are identified by a name and optional
+    labels passed as keyword arguments.
+    """
+
+    counters: dict[tuple[str, LabelSet], float]
+    histograms: dict[tuple[str, LabelSet], Histogram]
+
+    def __init__(self):
+        self.enabled = False
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def enable(self, enabled: bool = True) -> None:
+        """Enable (or disable) recording."""
+        self.enabled = enabled
+
+    def reset(self) -> None:
+        """Remove all recorded values."""
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Increment a counter."""
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record a value to a histogram."""
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def timer(self, name: str, **labels) -> Timer:
+        """Return a context manager / decorator measuring duration."""
+        return Timer(self, name, labels)
+
+    def snapshot(self) -> dict[str, list[dict[str, Any]]]:
+        """Return a JSON-serializable copy of recorded values."""
+        with self.lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            histograms = []
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                histograms.append(
+                    {
+                        "name": name,
+                        "labels": dict(labels),
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "buckets": dict(
+                            zip(histogram.buckets, histogram.counts, strict=True)
+                        ),
+                    }
+                )
+        return {"counters": counters, "histograms": histograms}
+
+    def render_prometheus(self) -> str:
+        """Render recorded values in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            last_name = None
+            for (name, labels), value in sorted(self.counters.items()):
+                if name != last_name:
+                    lines.append(f"# TYPE {name} counter")
+                    last_name = name
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+            last_name = None
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name != last_name:
+                    lines.append(f"# TYPE {name} histogram")
+                    last_name = name
+                cumulative = 0
+                for bound, count in zip(
+                    histogram.buckets, histogram.counts, strict=True
+                ):
+                    cumulative += count
+                    le = (("le", _format_value(bound)),)
+                    lines.append(
+                        f"{name}_bucket{_format_labels(labels, le)} {cumulative}"
+                    )
+                le = (("le", "+Inf"),)
+                lines.append(
+                    f"{name}_bucket{_format_labels(labels, le)} {histogram.count}"
+                )
+                lines.append(
+                    f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}"
+                )
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+metrics = Metrics()
@@ -0,0 +1,259 @@
+"""In-memory full-text index of slugified tokens."""
+
+__all__ = ["SlugIndex"]
+
+import array
+import bisect
+import heapq
+import os
+import pickle
+from collections.abc import Iterable
+from typing import Literal
+
+from .text import slugify
+
+SNAPSHOT_VERSION = 1
+
+
+def _intersect(postings: list[array.array]) -> list[int]:
+    """Intersect sorted postings, starting with the shortest one."""
+    postings = sorted(postings, key=len)
+    result = list(postings[0])
+    for other in postings[1:]:
+        if not result:
+            break
+        if len(other) > 8 * len(result):
+            # Galloping: binary search the long list for each candidate
+            lo = 0
+            hi = len(other)
+            matches = []
+            for doc_id in result:
+                lo = bisect.bisect_left(other, doc_id, lo, hi)
+                if lo == hi:
+                    break
+                if other[lo] == doc_id:
+                    matches.append(doc_id)
+            result = matches
+        else:
+            other_set = set(other)
+            result = [doc_id for doc_id in result if doc_id in other_set]
+    return result
+
+
+def _union(postings: list[array.array]) -> list[int]:
+    """Merge sorted postings into a sorted list without duplicates."""
+    if len(postings) == 1:
+        return list(postings[0])
+    result: list[int] = []
+    last = None
+    for doc_id in heapq.merge(*postings):
+        if doc_id != last:
+            result.append(doc_id)
+            last = doc_id
+    return result
+
+
+class SlugIndex:
+    """Inverted index of slugified tokens.
+
+    Documents are identified by integer IDs and tokenized using
+    `slugify(make_set=True)`, so the index matches the same way as
+    existing slug-based comparisons (case-insensitive, transliterated).
+
+    Postings are kept as sorted arrays of 64-bit integers. Adding
+    documents in ascending ID order is the fast path (plain append).
+
+    Example:
+        index = SlugIndex()
+        index.add(1, "Příliš žluťoučký kůň")
+        index.add(2, "Žluté ponorky")
+        index.search("zlut", prefix=True)  # [1, 2]
+    """
+
+    def __init__(self, min_length: int = 1):
+        self.min_length = min_length
+        self.postings: dict[str, array.array] = {}
+        self.documents: dict[int, tuple[str, ...]] = {}
+        # Sorted list of indexed tokens used for prefix lookups. It is
+        # updated lazily on the next prefix query, not on every change.
+        self._vocabulary: list[str] = []
+        self._vocabulary_added: list[str] = []
+        self._vocabulary_dirty = False
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self.documents
+
+    def tokenize(self, text: str) -> set[str]:
+        """Return a set of normalized tokens for a given text."""
+        tokens = slugify(text, make_set=True, min_length=self.min_length)
+        assert isinstance(tokens, set)
+        return tokens
+
+    def add(self, doc_id: int, text: str) -> None:
+        """Index a document. Existing document with the same ID is replaced."""
+        if doc_id in self.documents:
+            self.remove(doc_id)
+        tokens = self.tokenize(text)
+        for token in tokens:
+            posting = self.postings.get(token)
+            if posting is None:
+                self.postings[token] = array.array("q", [doc_id])
+                self._vocabulary_added.append(token)
+            elif posting[-1] < doc_id:
+                posting.append(doc_id)
+            else:
+                posting.insert(bisect.bisect_left(posting, doc_id), doc_id)
+        self.documents[doc_id] = tuple(tokens)
+
+    def update(self, doc_id: int, text: str) -> None:
+        """Re-index an existing document (alias for `add`)."""
+        self.add(doc_id, text)
+
+    def add_many(self, documents: Iterable[tuple[int, str]]) -> None:
+        """Index (doc_id, text) pairs.
+
+        Sorting the input by ID beforehand makes this considerably faster.
+        """
+        for doc_id, text in documents:
+            self.add(doc_id, text)
+
+    def remove(self, doc_id: int) -> bool:
+        """Remove a document from the index.
+
+        Returns:
+            bool: `True` if the document was indexed
+        """
+        tokens = self.documents.pop(doc_id, None)
+        if tokens is None:
+            return False
+        for token in tokens:
+            posting = self.postings[token]
+            idx = bisect.bisect_left(posting, doc_id)
+            del posting[idx]
+            if not posting:
+                del self.postings[token]
+                self._vocabulary_dirty = True
+        return True
+
+    def clear(self) -> None:
+        """Remove all documents from the index."""
+        self.postings.clear()
+        self.documents.clear()
+        self._vocabulary.clear()
+        self._vocabulary_added.clear()
+        self._vocabulary_dirty = False
+
+    def _expand(self, prefix: str) -> list[str]:
+        """Return all indexed tokens starting with the given prefix."""
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self.postings)
+            self._vocabulary_added.clear()
+            self._vocabulary_dirty = False
+        elif self._vocabulary_added:
+            # two sorted runs: timsort merges them in linear time
+            self._vocabulary.extend(sorted(self._vocabulary_added))
+            self._vocabulary.sort()
+            self._vocabulary_added.clear()
+        vocabulary = self._vocabulary
+        start = bisect.bisect_left(vocabulary, prefix)
+        end = bisect.bisect_left(vocabulary, prefix + "\U0010ffff", start)
+        return vocabulary[start:end]
+
+    def _lookup(self, token: str, prefix: bool) -> array.array | None:
+        if not prefix:
+            return self.postings.get(token)
+        tokens = self._expand(token)
+        if not tokens:
+            return None
+        if len(tokens) == 1:
+            return self.postings[tokens[0]]
+        return array.array("q", _union([self.postings[t] for t in tokens]))
+
+    def search(
+        self,
+        query: str,
+        mode: Literal["and", "or"] = "and",
+        prefix: bool = False,
+        limit: int | None = None,
+    ) -> list[int]:
+        """Return sorted IDs of documents matching the query.
+
+        Args:
+            query (str):
+                Query text. It is normalized the same way as indexed documents
+
+            mode (str):
+                "and" to match documents containing all query tokens,
+                "or" to match documents containing any of them (default: "and")
+
+            prefix (bool):
+                Treat query tokens as prefixes (default: False)
+
+            limit (int):
+                Return at most `limit` IDs
+
+        Returns:
+            list[int]: IDs of matching documents
+        """
+        if mode not in ("and", "or"):
+            raise ValueError(f"Invalid search mode: {mode}")
+        tokens = self.tokenize(query)
+        if not tokens:
+            return []
+
+        postings = []
+        for token in tokens:
+            posting = self._lookup(token, prefix)
+            if posting is None:
+                if mode == "and":
+                    return []
+                continue
+            postings.append(posting)
+
+        if not postings:
+            return []
+        result = _intersect(postings) if mode == "and" else _union(postings)
+        return result[:limit] if limit is not None else result
+
+    #
+    # Snapshots
+    #
+
+    def save(self, path: str) -> None:
+        """Write a snapshot of the index to a file.
+
+        The snapshot is written to a temporary file first
+        and atomically moved to the target path.
+        """
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "min_length": self.min_length,
+            "postings": {k: v.tobytes() for k, v in self.postings.items()},
+            "documents": self.documents,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SlugIndex":
+        """Load an index from a snapshot created using `save`.
+
+        Snapshots are pickle files, so load only trusted ones.
+        """
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        if data.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version in {path}")
+        index = cls(min_length=data["min_length"])
+        for token, raw in data["postings"].items():
+            posting = array.array("q")
+            posting.frombytes(raw)
+            index.postings[token] = posting
+        index._vocabulary = sorted(index.postings)
+        index.documents = data["documents"]
+        return index
@@ -1,15 +1,16 @@
 import string
-import unidecode
-
+from collections.abc import Callable
 
 default_slug_whitelist = string.ascii_letters + string.digits
 slug_separator_whitelist = " ,./\\;:!|*^#@~+-_="
 
+_unidecode: Callable[[str], str] | None = None
+
 
 def indent(src, length: int = 4):
     """Indent a multi-line text."""
     return (
-        "\n".join([f"{length*' '}{s.rstrip()}" for s in src.split("\n")]) + "\n"
+        "\n".join([f"{length * ' '}{s.rstrip()}" for s in src.split("\n")]) + "\n"
         if src.endswith("\n")
         else ""
     )
@@ -17,7 +18,12 @@ def indent(src, length: int = 4):
 
 def unaccent(string: str) -> str:
     """Remove accents and/or transliterate non-ascii characters."""
-    return unidecode.unidecode(string)
+    global _unidecode
+    if _unidecode is None:
+        from unidecode import unidecode
+
+        _unidecode = unidecode
+    return _unidecode(string)
 
 
 def slugify(
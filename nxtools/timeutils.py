@@ -1,5 +1,9 @@
+import bisect
 import datetime
+import heapq
 import time
+from collections.abc import Iterator
+from typing import Any, NamedTuple
 
 
 def datestr2ts(datestr: str, hh: int = 0, mm: int = 0, ss: int = 0) -> int:
@@ -207,3 +211,211 @@ def format_time(
         return never_placeholder
     tstruct = time.gmtime(timestamp) if gmt else time.localtime(timestamp)
     return time.strftime(time_format, tstruct)
+
+
+def to_frames(value: str | float, base: float = 25) -> int:
+    """Convert a timecode string or a number of seconds to frames.
+
+    Args:
+        value (str | float):
+            SMPTE timecode (`HH:MM:SS:FF`) or number of seconds
+
+        base (float):
+            Frame rate (default: 25)
+
+    Returns:
+        int:
+            Number of frames
+    """
+    if isinstance(value, str):
+        value = tc2s(value, base)
+    return int(round(value * base))
+
+
+class Interval(NamedTuple):
+    """A half-open [start, end) interval stored in an IntervalIndex."""
+
+    start: int
+    end: int
+    key: int
+    data: Any = None
+
+
+class IntervalIndex:
+    """Index of time intervals for overlap, point and gap queries.
+
+    Intervals are stored in integer frames at the given frame rate.
+    Boundaries may be passed as timecode strings or seconds
+    and are converted using `to_frames`. Intervals are half-open,
+    so an event ending at 10:00:00:00 does not overlap
+    an event starting at the same timecode.
+
+    Point and range queries use a max-end segment tree over
+    the intervals sorted by start, which is rebuilt lazily
+    after modifications, so bulk loading followed by queries
+    costs O(n log n) overall.
+
+    Example:
+        index = IntervalIndex(base=25)
+        index.add("10:00:00:00", "10:30:00:00", data="News")
+        index.add("10:29:00:00", "11:00:00:00", data="Movie")
+        list(index.overlaps())  # [(News, Movie)]
+        index.at("10:15:00:00")  # [News]
+    """
+
+    def __init__(self, base: float = 25):
+        self.base = base
+        self._items: list[Interval] = []
+        self._starts: list[int] = []
+        self._tree: list[int] | None = None
+        self._size = 0
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Interval]:
+        return iter(self._items)
+
+    def frames(self, value: str | float) -> int:
+        """Convert a timecode or seconds to frames at the index frame rate."""
+        return to_frames(value, self.base)
+
+    def add(self, start: str | float, end: str | float, data: Any = None) -> Interval:
+        """Add an interval to the index.
+
+        Args:
+            start (str | float):
+                Start timecode or seconds (inclusive)
+
+            end (str | float):
+                End timecode or seconds (exclusive)
+
+            data (Any):
+                Arbitrary payload (event ID, dict...)
+
+        Returns:
+            Interval:
+                The stored interval. Use it to remove the interval later.
+        """
+        start_frame = self.frames(start)
+        end_frame = self.frames(end)
+        if end_frame <= start_frame:
+            raise ValueError("Interval end must be greater than its start")
+        self._seq += 1
+        interval = Interval(start_frame, end_frame, self._seq, data)
+        idx = bisect.bisect_right(self._items, interval)
+        self._items.insert(idx, interval)
+        self._starts.insert(idx, start_frame)
+        self._tree = None
+        return interval
+
+    def remove(self, interval: Interval) -> bool:
+        """Remove an interval returned by `add`.
+
+        Returns:
+            bool: `True` if the interval was found
+        """
+        idx = bisect.bisect_left(self._items, interval)
+        if idx == len(self._items) or self._items[idx].key != interval.key:
+            return False
+        del self._items[idx]
+        del self._starts[idx]
+        self._tree = None
+        return True
+
+    def clear(self) -> None:
+        """Remove all intervals."""
+        self._items.clear()
+        self._starts.clear()
+        self._tree = None
+
+    def _build(self) -> list[int]:
+        size = 1
+        while size < len(self._items):
+            size *= 2
+        tree = [-1] * (2 * size)
+        for i, item in enumerate(self._items):
+            tree[size + i] = item.end
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._size = size
+        self._tree = tree
+        return tree
+
+    def _query(self, start: int, end: int) -> list[Interval]:
+        """Return intervals with item.start < end and item.end > start."""
+        limit = bisect.bisect_left(self._starts, end)
+        if not limit:
+            return []
+        tree = self._tree if self._tree is not None else self._build()
+        result = []
+        stack = [(1, 0, self._size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= limit or tree[node] <= start:
+                continue
+            if hi - lo == 1:
+                result.append(self._items[lo])
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node + 1, mid, hi))
+            stack.append((2 * node, lo, mid))
+        return result
+
+    def at(self, time: str | float) -> list[Interval]:
+        """Return intervals containing the given time, ordered by start."""
+        frame = self.frames(time)
+        return self._query(frame, frame + 1)
+
+    def overlapping(self, start: str | float, end: str | float) -> list[Interval]:
+        """Return intervals overlapping the [start, end) range, ordered by start."""
+        return self._query(self.frames(start), self.frames(end))
+
+    def overlaps(self) -> Iterator[tuple[Interval, Interval]]:
+        """Yield all pairs of mutually overlapping intervals.
+
+        Runs in O(n log n + k) time, where k is the number of pairs.
+        """
+        active: list[tuple[int, int, Interval]] = []
+        for item in self._items:
+            while active and active[0][0] <= item.start:
+                heapq.heappop(active)
+            for _, _, other in active:
+                yield other, item
+            heapq.heappush(active, (item.end, item.key, item))
+
+    def gaps(
+        self,
+        start: str | float | None = None,
+        end: str | float | None = None,
+    ) -> list[tuple[int, int]]:
+        """Return uncovered [start, end) frame ranges.
+
+        Args:
+            start (str | float):
+                Start of the examined range.
+                Defaults to the start of the first interval.
+
+            end (str | float):
+                End of the examined range.
+                Defaults to the end of the last interval.
+
+        Returns:
+            list[tuple[int, int]]:
+                List of gaps in frames
+        """
+        if not self._items and (start is None or end is None):
+            return []
+        cursor = self._items[0].start if start is None else self.frames(start)
+        limit = None if end is None else self.frames(end)
+        result = []
+        for item in self._items:
+            if limit is not None and item.start >= limit:
+                break
+            if item.start > cursor:
+                result.append((cursor, item.start))
+            cursor = max(cursor, item.end)
+        if limit is not None and cursor < limit:
+            result.append((cursor, limit))
+        return result
@@ -0,0 +1,274 @@
+"""Disk usage statistics."""
+
+__all__ = ["AgeHistogram", "TopFiles", "DiskUsage", "disk_usage"]
+
+import heapq
+import itertools
+import os
+import time
+from collections.abc import Callable, Iterable
+
+from .files import FileObject, get_files
+from .text import format_filesize
+
+# Age histogram bucket edges in days
+DEFAULT_AGE_EDGES = (7, 30, 90, 180, 365)
+
+
+class AgeHistogram:
+    """Count files and bytes by age of the modification or access time.
+
+    Args:
+        attribute (str):
+            "mtime" or "atime" (default: "mtime")
+
+        edges (tuple[int, ...]):
+            Bucket edges in days (default: 7, 30, 90, 180, 365 days)
+
+        now (float):
+            Reference time (default: current time)
+    """
+
+    def __init__(
+        self,
+        attribute: str = "mtime",
+        edges: Iterable[int] = DEFAULT_AGE_EDGES,
+        now: float | None = None,
+    ):
+        self.attribute = attribute
+        self.edges = sorted(edges)
+        self.now = time.time() if now is None else now
+        self.limits = [self.now - days * 86400 for days in self.edges]
+        self.counts = [0] * (len(self.edges) + 1)
+        self.sizes = [0] * (len(self.edges) + 1)
+
+    def add(self, file_object: FileObject) -> None:
+        timestamp = getattr(file_object, self.attribute)
+        index = 0
+        for limit in self.limits:
+            if timestamp > limit:
+                break
+            index += 1
+        self.counts[index] += 1
+        self.sizes[index] += file_object.size
+
+    @property
+    def labels(self) -> list[str]:
+        result = [f"< {self.edges[0]} days"]
+        for low, high in itertools.pairwise(self.edges):
+            result.append(f"{low}-{high} days")
+        result.append(f"> {self.edges[-1]} days")
+        return result
+
+    @property
+    def buckets(self) -> list[tuple[str, int, int]]:
+        """Return (label, file count, total size) of each bucket."""
+        return list(zip(self.labels, self.counts, self.sizes, strict=True))
+
+    def older_than(self, days: int) -> tuple[int, int]:
+        """Return file count and size of files older than one of the edges."""
+        if days not in self.edges:
+            raise ValueError(f"{days} is not a bucket edge of the histogram")
+        index = self.edges.index(days) + 1
+        return sum(self.counts[index:]), sum(self.sizes[index:])
+
+
+class TopFiles:
+    """Keep the N files with the highest value of a key.
+
+    Only N files are kept in memory (a min-heap), regardless of
+    the number of files added.
+
+    Args:
+        count (int):
+            Number of files to keep
+
+        key (function):
+            Function returning the compared value of a FileObject.
+            Use a negative value to keep the lowest values
+            (e.g. `lambda f: -f.atime` for least recently accessed files).
+    """
+
+    def __init__(self, count: int, key: Callable[[FileObject], float]):
+        self.count = count
+        self.key = key
+        self.heap: list[tuple[float, int, FileObject]] = []
+        self.counter = itertools.count()
+
+    def add(self, file_object: FileObject) -> None:
+        item = (self.key(file_object), next(self.counter), file_object)
+        if len(self.heap) < self.count:
+            heapq.heappush(self.heap, item)
+        elif item[0] > self.heap[0][0]:
+            heapq.heapreplace(self.heap, item)
+
+    @property
+    def files(self) -> list[FileObject]:
+        """Return the kept files, the highest value first."""
+        return [item[2] for item in sorted(self.heap, reverse=True)]
+
+
+class DiskUsage:
+    """Aggregate statistics of a stream of files in a single pass.
+
+    Memory use depends on the number of directories (which can be
+    limited using `max_depth`) and on `top`, not on the number of files.
+
+    Args:
+        root (str):
+            Common base path of the added files.
+            Directory statistics use paths relative to it.
+
+        max_depth (int):
+            Aggregate deeper directories to their ancestor at this depth
+            (default: no limit)
+
+        top (int):
+            Number of files kept in the top lists (default: 100)
+
+        age_edges (tuple[int, ...]):
+            Age histogram bucket edges in days
+
+        now (float):
+            Reference time for age histograms (default: current time)
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_depth: int | None = None,
+        top: int = 100,
+        age_edges: Iterable[int] = DEFAULT_AGE_EDGES,
+        now: float | None = None,
+    ):
+        self.root = root.rstrip(os.sep) or os.sep
+        self.max_depth = max_depth
+        self.total_count = 0
+        self.total_size = 0
+        # directory -> [size, count] of files directly in it
+        self._own: dict[str, list[int]] = {}
+        self.largest = TopFiles(top, key=lambda f: f.size)
+        self.newest = TopFiles(top, key=lambda f: f.mtime)
+        self.least_accessed = TopFiles(top, key=lambda f: -f.atime)
+        self.modified = AgeHistogram("mtime", age_edges, now)
+        self.accessed = AgeHistogram("atime", age_edges, now)
+
+    def _directory(self, path: str) -> str:
+        directory = os.path.dirname(path)
+        if directory.startswith(self.root):
+            directory = directory[len(self.root) :].lstrip(os.sep)
+        if self.max_depth is not None and directory:
+            parts = directory.split(os.sep)
+            if len(parts) > self.max_depth:
+                directory = os.sep.join(parts[: self.max_depth])
+        return directory
+
+    def add(self, file_object: FileObject) -> None:
+        size = file_object.size
+        self.total_count += 1
+        self.total_size += size
+        directory = self._directory(file_object.path)
+        try:
+            own = self._own[directory]
+        except KeyError:
+            own = self._own[directory] = [0, 0]
+        own[0] += size
+        own[1] += 1
+        self.largest.add(file_object)
+        self.newest.add(file_object)
+        self.least_accessed.add(file_object)
+        self.modified.add(file_object)
+        self.accessed.add(file_object)
+
+    def add_many(self, file_objects: Iterable[FileObject]) -> "DiskUsage":
+        for file_object in file_objects:
+            self.add(file_object)
+        return self
+
+    @property
+    def directories(self) -> dict[str, tuple[int, int]]:
+        """Return {directory: (size, file count)} including subdirectories.
+
+        The root directory is represented by an empty string.
+        """
+        totals: dict[str, list[int]] = {}
+        for directory, (size, count) in self._own.items():
+            path = directory
+            while True:
+                total = totals.setdefault(path, [0, 0])
+                total[0] += size
+                total[1] += count
+                if not path:
+                    break
+                path = os.path.dirname(path)
+        return {path: (size, count) for path, (size, count) in totals.items()}
+
+    def top_directories(
+        self,
+        count: int = 10,
+        depth: int | None = None,
+    ) -> list[tuple[str, int, int]]:
+        """Return (directory, size, file count) of the largest directories.
+
+        Args:
+            count (int):
+                Number of directories
+
+            depth (int):
+                Consider only directories at this depth (1 = subdirectories
+                of the root). By default, all directories are compared.
+        """
+        items = [
+            (path, size, files)
+            for path, (size, files) in self.directories.items()
+            if path and (depth is None or path.count(os.sep) + 1 == depth)
+        ]
+        return heapq.nlargest(count, items, key=lambda item: item[1])
+
+    def render(self, count: int = 10) -> str:
+        """Return a human-readable report."""
+        total = format_filesize(self.total_size) or "0 bytes"
+        lines = [
+            f"{self.root}: {self.total_count} files, {total}",
+            "",
+            "Largest directories:",
+        ]
+        for path, size, files in self.top_directories(count, depth=1):
+            size_str = format_filesize(size) or "0 bytes"
+            lines.append(f"  {size_str:>10}  {files:>8} files  {path}")
+        lines.extend(["", "Largest files:"])
+        for file_object in self.largest.files[:count]:
+            size_str = format_filesize(file_object.size) or "0 bytes"
+            lines.append(f"  {size_str:>10}  {file_object.path}")
+        for title, histogram in (
+            ("Last modified:", self.modified),
+            ("Last accessed:", self.accessed),
+        ):
+            lines.extend(["", title])
+            for label, files, size in histogram.buckets:
+                size_str = format_filesize(size) or "0 bytes"
+                lines.append(f"  {label:>16}  {files:>8} files  {size_str:>10}")
+        return "\n".join(lines)
+
+
+def disk_usage(
+    root: str,
+    max_depth: int | None = None,
+    top: int = 100,
+    age_edges: Iterable[int] = DEFAULT_AGE_EDGES,
+    **kwargs,
+) -> DiskUsage:
+    """Crawl a directory tree and return its DiskUsage statistics.
+
+    Files are processed as `get_files` yields them and are not stored
+    (except those kept in the top lists). Additional keyword arguments
+    (`hidden`, `exts`...) are passed to `get_files`.
+
+    ```python
+    usage = disk_usage("/mnt/archive", max_depth=2)
+    print(usage.render())
+    count, size = usage.accessed.older_than(180)
+    ```
+    """
+    usage = DiskUsage(root, max_depth=max_depth, top=top, age_edges=age_edges)
+    return usage.add_many(get_files(root, recursive=True, **kwargs))